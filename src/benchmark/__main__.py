@@ -0,0 +1,64 @@
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from benchmark.matching import main
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(levelname)s %(message)s", level=logging.INFO)
+
+    argparser = argparse.ArgumentParser(
+        description="Benchmark the image matching of the robot on recorded frames."
+    )
+    argparser.add_argument(
+        "--frames",
+        type=Path,
+        required=True,
+        help="Directory with recorded frames, e.g. the image_grab dumps of a DEBUG run.",
+    )
+    argparser.add_argument(
+        "--output",
+        type=Path,
+        required=False,
+        default=None,
+        help="Write the JSON results to this file instead of stdout.",
+    )
+    argparser.add_argument(
+        "--baseline",
+        type=Path,
+        required=False,
+        default=None,
+        help="Compare against the JSON results of an earlier run.",
+    )
+    argparser.add_argument(
+        "--runs",
+        type=int,
+        required=False,
+        default=20,
+        help="Number of runs per benchmark.",
+    )
+    argparser.add_argument(
+        "--tolerance",
+        type=float,
+        required=False,
+        default=0.2,
+        help="Allowed slowdown against the baseline, 0.2 means 20%%.",
+    )
+    argparser.add_argument(
+        "--pyramid",
+        action="store_true",
+        help="Use coarse-to-fine matching.",
+    )
+    args = argparser.parse_args()
+
+    sys.exit(
+        main(
+            frames_dir=args.frames,
+            output=args.output,
+            baseline_path=args.baseline,
+            runs=args.runs,
+            tolerance=args.tolerance,
+            pyramid=args.pyramid,
+        )
+    )
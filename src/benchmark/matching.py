@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import platform
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from statistics import median
+from typing import Awaitable, Callable
+
+import cv2
+import numpy
+
+from robot.app import (
+    App,
+    MultipleMatchesFoundException,
+    find_match_locations,
+    find_peaks,
+)
+from robot.frame_source import ReplayFrameSource
+from robot.page_classifier import PageClassifier
+from robot.paths import get_small_image_dir
+from robot.region_hints import region_hints
+from robot.template_store import template_store
+from robot.tracing import tracer
+
+
+@dataclass
+class BenchmarkResult:
+    median_ms: float
+    min_ms: float
+    runs: int
+
+
+@dataclass
+class Regression:
+    name: str
+    baseline_ms: float
+    current_ms: float
+
+    def __str__(self) -> str:
+        ratio = self.current_ms / self.baseline_ms
+        return f"{self.name}: {self.baseline_ms:.3f} ms → {self.current_ms:.3f} ms ({ratio:.2f}x)"
+
+
+async def _measure(call: Callable[[], Awaitable[object]], runs: int) -> BenchmarkResult:
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        try:
+            await call()
+        except MultipleMatchesFoundException:
+            pass
+        durations.append((time.perf_counter() - start) * 1000)
+    return BenchmarkResult(
+        median_ms=round(median(durations), 3),
+        min_ms=round(min(durations), 3),
+        runs=runs,
+    )
+
+
+def _create_app(frames_dir: Path, pyramid: bool) -> App:
+    app = App()
+    app.frame_source = ReplayFrameSource(frames_dir, loop=True)
+    # every run has to do the full work
+    app.skip_unchanged_matches = False
+    app.capture_max_age = 0
+    app.pyramid_matching = pyramid
+    return app
+
+
+async def benchmark_locate(
+    frames_dir: Path, runs: int, pyramid: bool
+) -> dict[str, BenchmarkResult]:
+    app = _create_app(frames_dir, pyramid)
+    img_dir = get_small_image_dir()
+    window_bbox = app._get_bounding_box()
+    results: dict[str, BenchmarkResult] = {}
+    for path in sorted(img_dir.rglob("*.png")):
+        small_image = template_store.get(path)
+        if (
+            small_image.shape[0] > window_bbox[3] - window_bbox[1]
+            or small_image.shape[1] > window_bbox[2] - window_bbox[0]
+        ):
+            continue
+        name = f"locate/{path.relative_to(img_dir).as_posix()}"
+        results[name] = await _measure(lambda: app.locate(path), runs)
+    return results
+
+
+async def benchmark_classify(
+    frames_dir: Path, runs: int, pyramid: bool
+) -> dict[str, BenchmarkResult]:
+    app = _create_app(frames_dir, pyramid)
+    classifier = PageClassifier(app)
+    return {"classify/all_pages": await _measure(classifier.classify, runs)}
+
+
+async def benchmark_peaks(frames_dir: Path, runs: int) -> dict[str, BenchmarkResult]:
+    app = _create_app(frames_dir, pyramid=False)
+    large_image, _ = await app.grab()
+    small_image = template_store.get(
+        get_small_image_dir() / "sphere_runner/click_preview.png"
+    )
+    match = cv2.matchTemplate(large_image.gray_image, small_image, cv2.TM_CCOEFF_NORMED)
+    # worst case for the clustering: the maximum number of locations
+    rng = numpy.random.default_rng(0)
+    yloc = rng.integers(0, 20, 20)
+    xloc = rng.integers(0, 20, 20)
+    scores = rng.random(20).astype(numpy.float32)
+
+    async def locations():
+        find_match_locations(match, 0.8)
+
+    async def peaks():
+        find_peaks(yloc, xloc, scores)
+
+    return {
+        "peaks/find_match_locations": await _measure(locations, runs),
+        "peaks/find_peaks": await _measure(peaks, runs),
+    }
+
+
+def run_benchmarks(
+    frames_dir: Path, runs: int = 20, pyramid: bool = False
+) -> dict[str, object]:
+    region_hints.learning = False
+    tracer.enabled = False
+    template_store.warm_up()
+    results: dict[str, BenchmarkResult] = {}
+    results.update(asyncio.run(benchmark_locate(frames_dir, runs, pyramid)))
+    results.update(asyncio.run(benchmark_classify(frames_dir, runs, pyramid)))
+    results.update(asyncio.run(benchmark_peaks(frames_dir, runs)))
+    return {
+        "environment": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "numpy": numpy.__version__,
+            "frames": len(ReplayFrameSource(frames_dir)),
+            "pyramid": pyramid,
+        },
+        "results": {name: asdict(result) for name, result in results.items()},
+    }
+
+
+def compare(
+    report: dict, baseline: dict, tolerance: float
+) -> tuple[list[Regression], list[str]]:
+    """
+    Compares the median durations against a baseline report.
+
+    Returns: the benchmarks slower than the baseline by more than the tolerance and the benchmarks missing in the baseline
+    """
+    regressions: list[Regression] = []
+    missing: list[str] = []
+    for name, result in report["results"].items():
+        if name not in baseline["results"]:
+            missing.append(name)
+            continue
+        baseline_ms = baseline["results"][name]["median_ms"]
+        if result["median_ms"] > baseline_ms * (1 + tolerance):
+            regressions.append(Regression(name, baseline_ms, result["median_ms"]))
+    return regressions, missing
+
+
+def main(
+    frames_dir: Path,
+    output: Path | None,
+    baseline_path: Path | None,
+    runs: int,
+    tolerance: float,
+    pyramid: bool,
+) -> int:
+    report = run_benchmarks(frames_dir, runs=runs, pyramid=pyramid)
+    content = json.dumps(report, indent=2)
+    if output is not None:
+        output.write_text(content + "\n")
+        logging.info(f"Saved benchmark results to {output} .")
+    else:
+        print(content)
+
+    if baseline_path is None:
+        return 0
+    baseline = json.loads(baseline_path.read_text())
+    regressions, missing = compare(report, baseline, tolerance)
+    for name in missing:
+        logging.warning(f"No baseline for {name}")
+    for regression in regressions:
+        logging.error(f"Regression {regression}")
+    if regressions:
+        return 1
+    logging.info(f"No regressions against {baseline_path} .")
+    return 0
@@ -0,0 +1,216 @@
+import glob
+import json
+import logging
+import os
+import shutil
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from robot.paths import get_builds_download_dir, get_cache_dir
+
+
+@dataclass
+class ArtifactEntry:
+    size: int
+    # unix time
+    last_used: float
+    # the screenshots are kept regardless of the quota, e.g. while the VRT review of the build is pending
+    pinned: bool = False
+
+
+class ArtifactCache:
+    """
+    Keeps the build folders `get_data_dir(version)` within a disk quota, the least recently used unpinned builds are deleted first.
+    Of pinned builds only the app and the zip are deleted, their screenshots are kept.
+    The index is stored in `artifacts.json` in the cache directory and is rebuilt from the disk on `scan`.
+    """
+
+    file_name = "artifacts.json"
+    # needed by BaselineIndex.record_dir once the review of a pinned build passed
+    kept_dir_name = "screenshots"
+
+    def __init__(
+        self,
+        quota_bytes: float = 50e9,
+        root: Path | None = None,
+        index_path: Path | None = None,
+    ):
+        self.quota_bytes = quota_bytes
+        self.root = root if root is not None else get_builds_download_dir()
+        self.index_path = (
+            index_path if index_path is not None else get_cache_dir() / self.file_name
+        )
+        self.entries: dict[str, ArtifactEntry] = {}
+        # size per (st_dev, st_ino) of the files of each build, files hard-linked between builds are shared
+        self._files: dict[str, dict[tuple[int, int], int]] = {}
+
+    def scan(self) -> None:
+        """
+        Rebuilds the index from the build folders on disk. Usage times and pins are taken over from the stored index.
+        """
+        stored: dict[str, ArtifactEntry] = {}
+        if self.index_path.exists():
+            try:
+                stored = {
+                    version: ArtifactEntry(**entry)
+                    for version, entry in json.loads(
+                        self.index_path.read_text()
+                    ).items()
+                }
+            except (ValueError, TypeError):
+                logging.warning(f"Ignore invalid index {self.index_path} .")
+        self.entries = {}
+        self._files = {}
+        if self.root.exists():
+            for build_dir in self.root.iterdir():
+                entry = stored.get(build_dir.name)
+                # a pinned build may be left with its screenshots only
+                if not build_dir.is_dir() or (
+                    entry is None and not self._is_build_dir(build_dir)
+                ):
+                    continue
+                self.entries[build_dir.name] = ArtifactEntry(
+                    size=0,
+                    last_used=(
+                        entry.last_used
+                        if entry is not None
+                        else build_dir.stat().st_mtime
+                    ),
+                    pinned=entry.pinned if entry is not None else False,
+                )
+                self._files[build_dir.name] = self._get_files(build_dir)
+        self._update_sizes()
+        logging.info(
+            f"Found {len(self.entries)} builds with {self.total_size() / 1e9:.1f} GB in {self.root}/ ."
+        )
+        self.evict()
+
+    def total_size(self) -> int:
+        return sum(entry.size for entry in self.entries.values())
+
+    def recently_used(self) -> list[str]:
+        """
+        Returns the versions of the builds, most recently used first.
+        """
+        return sorted(
+            self.entries,
+            key=lambda version: self.entries[version].last_used,
+            reverse=True,
+        )
+
+    def touch(self, version: str) -> None:
+        """
+        Marks the build as used and updates the sizes, e.g. after a download.
+        """
+        entry = self.entries.setdefault(version, ArtifactEntry(0, 0))
+        entry.last_used = time.time()
+        # only this build is read from disk, the shares of the others are updated in memory
+        self._files[version] = self._get_files(self.root / version)
+        self._update_sizes()
+        self.save()
+
+    def pin(self, version: str) -> None:
+        entry = self.entries.get(version)
+        if entry is not None and not entry.pinned:
+            entry.pinned = True
+            self.save()
+
+    def unpin(self, version: str) -> None:
+        entry = self.entries.get(version)
+        if entry is not None and entry.pinned:
+            entry.pinned = False
+            self.save()
+
+    def evict(self, keep: str | None = None) -> None:
+        """
+        Deletes the least recently used unpinned builds until the quota is met, then the apps of the least recently used pinned builds.
+        The build `keep` is never deleted.
+        """
+        candidates = sorted(
+            (entry.pinned, entry.last_used, version)
+            for version, entry in self.entries.items()
+            if version != keep
+        )
+        total_size = self.total_size()
+        for pinned, _, version in candidates:
+            if total_size <= self.quota_bytes:
+                break
+            build_dir = self.root / version
+            if (
+                pinned
+                and build_dir.exists()
+                and all(path.name == self.kept_dir_name for path in build_dir.iterdir())
+            ):
+                continue
+            entry = self.entries[version]
+            logging.info(
+                f"Evict {'app of ' if pinned else ''}build {version} ({entry.size / 1e6:.0f} MB, last used {time.ctime(entry.last_used)})."
+            )
+            try:
+                if pinned:
+                    for path in build_dir.iterdir():
+                        if path.name == self.kept_dir_name:
+                            continue
+                        if path.is_dir() and not path.is_symlink():
+                            shutil.rmtree(path)
+                        else:
+                            path.unlink()
+                else:
+                    shutil.rmtree(build_dir)
+            except OSError as e:
+                # e.g. files of a running app on Windows
+                logging.warning(f"Failed to evict build {version}: {e}")
+            if build_dir.exists():
+                self._files[version] = self._get_files(build_dir)
+            else:
+                del self.entries[version]
+                self._files.pop(version, None)
+            # deleting a build changes the shares of the builds it shared files with
+            self._update_sizes()
+            total_size = self.total_size()
+        if total_size > self.quota_bytes:
+            logging.warning(
+                f"Build cache exceeds quota: {total_size / 1e9:.1f} GB > {self.quota_bytes / 1e9:.1f} GB"
+            )
+        self.save()
+
+    def save(self) -> None:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    version: asdict(entry)
+                    for version, entry in sorted(self.entries.items())
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        tmp_path.replace(self.index_path)
+
+    def _update_sizes(self) -> None:
+        # a file hard-linked between builds is split between them
+        links = Counter(inode for files in self._files.values() for inode in files)
+        for version, entry in self.entries.items():
+            files = self._files.get(version, {})
+            entry.size = sum(size // links[inode] for inode, size in files.items())
+
+    @staticmethod
+    def _is_build_dir(path: Path) -> bool:
+        # the app folder or the zip of a possibly interrupted download, other folders like `cache` and `debug` are not managed
+        return path.is_dir() and any(path.glob(f"Cynteract-{glob.escape(path.name)}*"))
+
+    @staticmethod
+    def _get_files(path: Path) -> dict[tuple[int, int], int]:
+        files: dict[tuple[int, int], int] = {}
+        for dir_path, _, file_names in os.walk(path):
+            for file_name in file_names:
+                try:
+                    stat = os.lstat(os.path.join(dir_path, file_name))
+                except OSError:
+                    continue
+                files[(stat.st_dev, stat.st_ino)] = stat.st_size
+        return files
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from robot.paths import get_cache_dir
+
+
+@dataclass
+class BaselineEntry:
+    sha256: str
+    # when VRT last accepted the image, as unix time
+    verified_at: float
+
+
+class BaselineIndex:
+    """
+    Content hashes of the screenshots VRT last accepted, per branch and test name, stored in `vrt_baselines.json` in the cache directory.
+    A screenshot with the same hash as its accepted baseline would be reported as OK, so its upload can be skipped.
+    """
+
+    file_name = "vrt_baselines.json"
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        main_branch: str = "development",
+        verify_interval: float = 7 * 24 * 3600,
+    ):
+        self.path = path if path is not None else get_cache_dir() / self.file_name
+        # VRT compares the images of other branches with the main branch until they have their own baseline
+        self.main_branch = main_branch
+        # unchanged images are uploaded again after this many seconds, in case the baseline changed on the server
+        self.verify_interval = verify_interval
+        self._entries: dict[str, dict[str, BaselineEntry]] | None = None
+
+    @staticmethod
+    def hash_file(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get(self, branch: str, name: str) -> BaselineEntry | None:
+        entries = self._load()
+        entry = entries.get(branch, {}).get(name)
+        if entry is None and branch != self.main_branch:
+            entry = entries.get(self.main_branch, {}).get(name)
+        return entry
+
+    def is_unchanged(self, branch: str, name: str, sha256: str) -> bool:
+        """
+        Returns True if the image matches its accepted baseline and was verified by VRT recently.
+        """
+        entry = self.get(branch, name)
+        return (
+            entry is not None
+            and entry.sha256 == sha256
+            and time.time() - entry.verified_at < self.verify_interval
+        )
+
+    def record(self, branch: str, name: str, sha256: str) -> None:
+        self._load().setdefault(branch, {})[name] = BaselineEntry(
+            sha256=sha256, verified_at=time.time()
+        )
+
+    def record_dir(self, branch: str, screenshot_dir: Path) -> None:
+        """
+        Records all screenshots of a build that was accepted as a whole.
+        """
+        for image_path in screenshot_dir.glob("*.png"):
+            self.record(branch, image_path.stem, self.hash_file(image_path))
+
+    def save(self) -> None:
+        if self._entries is None:
+            return
+        content = {
+            branch: {name: asdict(entry) for name, entry in sorted(entries.items())}
+            for branch, entries in sorted(self._entries.items())
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(content, indent=2) + "\n")
+        tmp_path.replace(self.path)
+        logging.info(
+            f"Save baseline hashes of {len(content)} branches to {self.path} ."
+        )
+
+    def _load(self) -> dict[str, dict[str, BaselineEntry]]:
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        if not self.path.exists():
+            return self._entries
+        for branch, entries in json.loads(self.path.read_text()).items():
+            self._entries[branch] = {
+                name: BaselineEntry(**entry) for name, entry in entries.items()
+            }
+        return self._entries
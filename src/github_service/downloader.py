@@ -0,0 +1,215 @@
+import base64
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+@dataclass
+class DownloadStats:
+    downloaded_bytes: int
+    resumed_bytes: int
+    seconds: float
+
+    def __str__(self) -> str:
+        megabytes = self.downloaded_bytes / 1e6
+        throughput = megabytes / self.seconds if self.seconds > 0 else 0.0
+        text = f"{megabytes:.1f} MB in {self.seconds:.1f} s ({throughput:.1f} MB/s)"
+        if self.resumed_bytes > 0:
+            text += f", {self.resumed_bytes / 1e6:.1f} MB resumed"
+        return text
+
+
+@dataclass
+class _Progress:
+    url: str
+    size: int
+    # identifies the remote file version, a changed file is downloaded from scratch
+    validator: str | None
+    chunk_size: int
+    completed_chunks: list[int] = field(default_factory=list)
+
+
+class Downloader:
+    """
+    Downloads large files with parallel range requests into `<file>.part`.
+    Completed chunks are recorded in the sidecar `<file>.part.json`, an interrupted download resumes from there.
+    Servers without range support are downloaded over a single stream.
+    """
+
+    def __init__(self, workers: int = 4, chunk_size: int = 16 * 1024 * 1024):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=workers,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=1,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["HEAD", "GET"],
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+
+    def download(
+        self, url: str, file_path: Path, sha256: str | None = None
+    ) -> DownloadStats:
+        """
+        Downloads `url` to `file_path` and verifies its size and checksum.
+        The checksum is the given SHA-256 or, for Google Cloud Storage, the MD5 sent by the server.
+        """
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path = file_path.with_name(file_path.name + ".part")
+        progress_path = file_path.with_name(file_path.name + ".part.json")
+        start = time.perf_counter()
+
+        response = self.session.head(url, allow_redirects=True, timeout=60)
+        response.raise_for_status()
+        size = int(response.headers.get("Content-Length", -1))
+        md5 = self._get_md5(response.headers)
+        if size > 0 and response.headers.get("Accept-Ranges") == "bytes":
+            validator = response.headers.get("ETag") or response.headers.get(
+                "Last-Modified"
+            )
+            progress = self._load_progress(progress_path, part_path)
+            if progress is None or (
+                progress.url,
+                progress.size,
+                progress.validator,
+                progress.chunk_size,
+            ) != (url, size, validator, self.chunk_size):
+                progress = _Progress(url, size, validator, self.chunk_size)
+                with open(part_path, "wb") as f:
+                    f.truncate(size)
+                self._save_progress(progress_path, progress)
+            resumed_bytes = self._download_ranges(
+                url, part_path, progress_path, progress
+            )
+        else:
+            logging.info(f"No range support, download {url} over a single stream.")
+            resumed_bytes = 0
+            size = self._download_stream(url, part_path, size)
+
+        try:
+            self._verify(part_path, size, sha256, md5)
+        except RuntimeError:
+            part_path.unlink(missing_ok=True)
+            progress_path.unlink(missing_ok=True)
+            raise
+        part_path.replace(file_path)
+        progress_path.unlink(missing_ok=True)
+        stats = DownloadStats(
+            downloaded_bytes=size - resumed_bytes,
+            resumed_bytes=resumed_bytes,
+            seconds=time.perf_counter() - start,
+        )
+        logging.info(f"Downloaded {file_path.name}: {stats} .")
+        return stats
+
+    def _download_ranges(
+        self, url: str, part_path: Path, progress_path: Path, progress: _Progress
+    ) -> int:
+        chunk_count = (progress.size + progress.chunk_size - 1) // progress.chunk_size
+        completed = set(progress.completed_chunks)
+        pending = [chunk for chunk in range(chunk_count) if chunk not in completed]
+        resumed_bytes = sum(self._chunk_length(progress, chunk) for chunk in completed)
+        if resumed_bytes > 0:
+            logging.info(
+                f"Resume download with {len(completed)}/{chunk_count} chunks done."
+            )
+
+        def download_chunk(chunk: int):
+            first = chunk * progress.chunk_size
+            last = first + self._chunk_length(progress, chunk) - 1
+            response = self.session.get(
+                url,
+                headers={"Range": f"bytes={first}-{last}"},
+                stream=True,
+                timeout=60,
+            )
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise RuntimeError(f"Range request returned {response.status_code}")
+            with open(part_path, "r+b") as f:
+                f.seek(first)
+                for data in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(data)
+                if f.tell() != last + 1:
+                    raise RuntimeError(f"Chunk {chunk} is incomplete")
+            with self._lock:
+                progress.completed_chunks.append(chunk)
+                self._save_progress(progress_path, progress)
+
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="download"
+        ) as executor:
+            # raises the first failure, the completed chunks stay recorded
+            list(executor.map(download_chunk, pending))
+        return resumed_bytes
+
+    def _download_stream(self, url: str, part_path: Path, size: int) -> int:
+        response = self.session.get(url, stream=True, timeout=60)
+        response.raise_for_status()
+        with open(part_path, "wb") as f:
+            for data in response.iter_content(chunk_size=1024 * 1024):
+                f.write(data)
+        return size if size > 0 else part_path.stat().st_size
+
+    @staticmethod
+    def _chunk_length(progress: _Progress, chunk: int) -> int:
+        return min(progress.chunk_size, progress.size - chunk * progress.chunk_size)
+
+    @staticmethod
+    def _get_md5(headers) -> str | None:
+        # e.g. `x-goog-hash: crc32c=n03x6A==,md5=Ojk9c3dhfxgoKVVHYwFbHQ==`
+        for value in headers.get("x-goog-hash", "").split(","):
+            name, _, digest = value.strip().partition("=")
+            if name == "md5":
+                return base64.b64decode(digest).hex()
+        return None
+
+    @staticmethod
+    def _verify(
+        part_path: Path, size: int, sha256: str | None, md5: str | None
+    ) -> None:
+        actual_size = part_path.stat().st_size
+        if actual_size != size:
+            raise RuntimeError(f"Expected {size} bytes, got {actual_size}")
+        if sha256 is None and md5 is None:
+            return
+        digest = hashlib.sha256() if sha256 is not None else hashlib.md5()
+        with open(part_path, "rb") as f:
+            while data := f.read(1024 * 1024):
+                digest.update(data)
+        expected = sha256 if sha256 is not None else md5
+        if digest.hexdigest() != expected:
+            raise RuntimeError(
+                f"Checksum mismatch: expected {expected}, got {digest.hexdigest()}"
+            )
+
+    @staticmethod
+    def _load_progress(progress_path: Path, part_path: Path) -> _Progress | None:
+        if not progress_path.exists() or not part_path.exists():
+            return None
+        try:
+            return _Progress(**json.loads(progress_path.read_text()))
+        except (ValueError, TypeError):
+            return None
+
+    @staticmethod
+    def _save_progress(progress_path: Path, progress: _Progress) -> None:
+        tmp_path = progress_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(asdict(progress)))
+        tmp_path.replace(progress_path)
@@ -0,0 +1,407 @@
+import json
+import logging
+import os
+import threading
+import time
+import zipfile
+import zlib
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import requests
+import urllib3
+
+from github_service.downloader import Downloader
+
+
+@dataclass
+class ExtractStats:
+    extracted_files: int = 0
+    extracted_bytes: int = 0
+    linked_files: int = 0
+    linked_bytes: int = 0
+    resumed_files: int = 0
+    resumed_bytes: int = 0
+
+    def __str__(self) -> str:
+        text = (
+            f"{self.extracted_files} files ({self.extracted_bytes / 1e6:.1f} MB) extracted, "
+            f"{self.linked_files} files ({self.linked_bytes / 1e6:.1f} MB) linked from previous builds"
+        )
+        if self.resumed_files > 0:
+            text += f", {self.resumed_files} files ({self.resumed_bytes / 1e6:.1f} MB) resumed"
+        return text
+
+
+class _RemoteZip:
+    """
+    Random access to a zip file on a server with range support.
+    The end of the file with the central directory is fetched once and shared by all readers.
+    """
+
+    tail_size = 1024 * 1024
+
+    def __init__(self, session: requests.Session, url: str, size: int):
+        self.session = session
+        self.url = url
+        self.size = size
+        self.tail_start = max(0, size - self.tail_size)
+        self.tail = self.get_range(self.tail_start, size)
+        self._lock = threading.Lock()
+
+    def get_range(self, start: int, end: int, stream: bool = False):
+        response = self.session.get(
+            self.url,
+            headers={"Range": f"bytes={start}-{end - 1}"},
+            stream=stream,
+            timeout=60,
+        )
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise RuntimeError(f"Range request returned {response.status_code}")
+        return response if stream else response.content
+
+    def extend_tail(self, start: int) -> None:
+        with self._lock:
+            if start < self.tail_start:
+                self.tail = self.get_range(start, self.tail_start) + self.tail
+                self.tail_start = start
+
+
+class _RemoteFile:
+    """
+    A file-like view of a `_RemoteZip` for `zipfile.ZipFile`. Sequential reads are served from one streamed range request.
+    """
+
+    def __init__(self, remote_zip: _RemoteZip, extend_tail: bool = False):
+        self.remote_zip = remote_zip
+        # the central directory is read into the shared tail
+        self.extend_tail = extend_tail
+        self.window: tuple[int, int] | None = None
+        self._pos = 0
+        self._response: requests.Response | None = None
+        self._stream_pos = 0
+        self._stream_end = 0
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self.remote_zip.size
+        self._pos = offset
+        return self._pos
+
+    def read(self, n: int = -1) -> bytes:
+        remote_zip = self.remote_zip
+        if self._pos >= remote_zip.tail_start:
+            start = self._pos - remote_zip.tail_start
+            data = remote_zip.tail[start : start + n if n >= 0 else None]
+        elif self.extend_tail:
+            remote_zip.extend_tail(self._pos)
+            return self.read(n)
+        else:
+            data = self._read_stream(n)
+        self._pos += len(data)
+        return data
+
+    def close(self) -> None:
+        if self._response is None:
+            return
+        # a nearly consumed stream is drained to keep its connection in the pool, e.g. after a data descriptor
+        if self._stream_end - self._stream_pos <= 64 * 1024:
+            try:
+                self._response.raw.read()
+            except (OSError, urllib3.exceptions.HTTPError):
+                # e.g. the connection that failed a read, it is dropped on close
+                pass
+        self._response.close()
+        self._response = None
+
+    def _read_stream(self, n: int) -> bytes:
+        if (
+            self._response is None
+            or self._stream_pos != self._pos
+            or self._stream_pos >= self._stream_end
+        ):
+            self.close()
+            end = self.remote_zip.tail_start
+            if self.window is not None and self.window[0] <= self._pos < self.window[1]:
+                end = self.window[1]
+            self._response = self.remote_zip.get_range(self._pos, end, stream=True)
+            self._stream_pos = self._pos
+            self._stream_end = end
+        data = self._response.raw.read(n if n >= 0 else None)
+        self._stream_pos += len(data)
+        return data
+
+
+class Extractor:
+    """
+    Extracts build zips with parallel workers, from a local file or directly from a server with range support.
+    Members with the same path, size and CRC as in a previous build are hard-linked from there instead of extracted.
+    Each build folder gets a manifest `<folder>.manifest.json` with the size and CRC of its files.
+    A failed member is retried from its local header, members finished by an interrupted extraction are kept.
+    """
+
+    # per member
+    attempts = 3
+    # e.g. a dropped connection, a timeout or a corrupted transfer
+    retried_errors = (
+        OSError,
+        EOFError,
+        RuntimeError,
+        zipfile.BadZipFile,
+        zlib.error,
+        urllib3.exceptions.HTTPError,
+    )
+
+    def __init__(self, downloader: Downloader):
+        self.downloader = downloader
+        self.workers = downloader.workers
+
+    @staticmethod
+    def get_manifest_path(app_folder: Path) -> Path:
+        return app_folder.with_name(app_folder.name + ".manifest.json")
+
+    def extract_url(
+        self, url: str, app_folder: Path, previous_folders: list[Path]
+    ) -> ExtractStats:
+        """
+        Extracts the zip without storing it. Falls back to downloading it first if the server has no range support.
+        """
+        response = self.downloader.session.head(url, allow_redirects=True, timeout=60)
+        response.raise_for_status()
+        size = int(response.headers.get("Content-Length", -1))
+        if size <= 0 or response.headers.get("Accept-Ranges") != "bytes":
+            zip_path = app_folder.with_name(app_folder.name + ".zip")
+            self.downloader.download(url, zip_path)
+            return self.extract_file(zip_path, app_folder, previous_folders)
+        remote_zip = _RemoteZip(self.downloader.session, url, size)
+        with zipfile.ZipFile(_RemoteFile(remote_zip, extend_tail=True)) as zip_file:
+            return self._extract(
+                zip_file,
+                lambda: zipfile.ZipFile(_RemoteFile(remote_zip)),
+                app_folder,
+                previous_folders,
+            )
+
+    def extract_file(
+        self, zip_path: Path, app_folder: Path, previous_folders: list[Path]
+    ) -> ExtractStats:
+        """
+        Extracts the zip and deletes it afterwards.
+        """
+        with zipfile.ZipFile(zip_path) as zip_file:
+            stats = self._extract(
+                zip_file,
+                lambda: zipfile.ZipFile(zip_path),
+                app_folder,
+                previous_folders,
+            )
+        zip_path.unlink()
+        return stats
+
+    def _extract(
+        self,
+        zip_file: zipfile.ZipFile,
+        open_zip: Callable[[], zipfile.ZipFile],
+        app_folder: Path,
+        previous_folders: list[Path],
+    ) -> ExtractStats:
+        start = time.perf_counter()
+        # extracted under a temporary name, an interrupted extraction keeps the members it finished
+        partial_folder = app_folder.with_name(app_folder.name + ".partial")
+        partial_manifest_path = self.get_manifest_path(partial_folder)
+        partial_manifest = (
+            self._load_manifest(partial_manifest_path)
+            if partial_folder.exists()
+            else {}
+        )
+        partial_folder.mkdir(parents=True, exist_ok=True)
+        previous_files = self._load_previous_files(previous_folders)
+
+        members = [info for info in zip_file.infolist() if not info.is_dir()]
+        # a member's local header and data end where the next member starts
+        offsets = sorted(info.header_offset for info in members) + [zip_file.start_dir]
+        member_ends = {offset: end for offset, end in zip(offsets, offsets[1:])}
+        manifest = {
+            info.filename: {"size": info.file_size, "crc": info.CRC} for info in members
+        }
+        partial_manifest_path.write_text(json.dumps(manifest))
+
+        stats = ExtractStats()
+        stats_lock = threading.Lock()
+        local = threading.local()
+        opened: list[zipfile.ZipFile] = []
+
+        def get_worker_zip() -> zipfile.ZipFile:
+            worker_zip = getattr(local, "zip_file", None)
+            if worker_zip is None:
+                worker_zip = local.zip_file = open_zip()
+                with stats_lock:
+                    opened.append(worker_zip)
+            return worker_zip
+
+        def discard_worker_zip() -> None:
+            worker_zip = local.zip_file
+            local.zip_file = None
+            with stats_lock:
+                opened.remove(worker_zip)
+            self._close_zip(worker_zip)
+
+        def extract_member(info: zipfile.ZipInfo):
+            if self._is_extracted(info, partial_folder, partial_manifest):
+                with stats_lock:
+                    stats.resumed_files += 1
+                    stats.resumed_bytes += info.file_size
+                return
+            if self._is_safe_target(info, partial_folder):
+                # a leftover may be hard-linked to a previous build, writing into it would change that build
+                (partial_folder / info.filename).unlink(missing_ok=True)
+            if self._link(info, partial_folder, previous_files):
+                with stats_lock:
+                    stats.linked_files += 1
+                    stats.linked_bytes += info.file_size
+                return
+            for attempt in range(1, self.attempts + 1):
+                worker_zip = get_worker_zip()
+                if isinstance(worker_zip.fp, _RemoteFile):
+                    worker_zip.fp.window = (
+                        info.header_offset,
+                        member_ends[info.header_offset],
+                    )
+                try:
+                    worker_zip.extract(info, partial_folder)
+                    break
+                except self.retried_errors as e:
+                    # the reopened zip requests the range again from the member's local header
+                    discard_worker_zip()
+                    if self._is_safe_target(info, partial_folder):
+                        (partial_folder / info.filename).unlink(missing_ok=True)
+                    if attempt == self.attempts:
+                        raise
+                    logging.warning(
+                        f"Failed to extract {info.filename} (attempt {attempt}/{self.attempts}): {e}"
+                    )
+                    time.sleep(attempt)
+            with stats_lock:
+                stats.extracted_files += 1
+                stats.extracted_bytes += info.file_size
+
+        try:
+            # folders are created upfront, zipfile does not create them safely from parallel threads
+            for info in zip_file.infolist():
+                if info.is_dir():
+                    zip_file.extract(info, partial_folder)
+                elif self._is_safe_target(info, partial_folder):
+                    (partial_folder / info.filename).parent.mkdir(
+                        parents=True, exist_ok=True
+                    )
+            executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="extract"
+            )
+            try:
+                # large members first to balance the workers
+                futures = [
+                    executor.submit(extract_member, info)
+                    for info in sorted(members, key=lambda info: -info.compress_size)
+                ]
+                done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+                for future in done:
+                    future.result()
+            finally:
+                # after the first failure the pending members are not started
+                executor.shutdown(cancel_futures=True)
+        finally:
+            for worker_zip in opened:
+                self._close_zip(worker_zip)
+
+        partial_folder.replace(app_folder)
+        partial_manifest_path.replace(self.get_manifest_path(app_folder))
+        logging.info(
+            f"Extracted {app_folder.name} in {time.perf_counter() - start:.1f} s: {stats}."
+        )
+        return stats
+
+    def _load_previous_files(
+        self, previous_folders: list[Path]
+    ) -> dict[tuple[str, int, int], Path]:
+        previous_files: dict[tuple[str, int, int], Path] = {}
+        for folder in previous_folders:
+            manifest_path = self.get_manifest_path(folder)
+            if not folder.exists() or not manifest_path.exists():
+                continue
+            for name, entry in self._load_manifest(manifest_path).items():
+                previous_files.setdefault(
+                    (name, entry["size"], entry["crc"]), folder / name
+                )
+        return previous_files
+
+    @staticmethod
+    def _load_manifest(manifest_path: Path) -> dict[str, dict[str, int]]:
+        if not manifest_path.exists():
+            return {}
+        try:
+            return json.loads(manifest_path.read_text())
+        except ValueError:
+            logging.warning(f"Ignore invalid manifest {manifest_path} .")
+            return {}
+
+    @staticmethod
+    def _close_zip(worker_zip: zipfile.ZipFile) -> None:
+        # a passed file object is not closed by the zip file
+        if isinstance(worker_zip.fp, _RemoteFile):
+            worker_zip.fp.close()
+        worker_zip.close()
+
+    @staticmethod
+    def _is_extracted(
+        info: zipfile.ZipInfo,
+        partial_folder: Path,
+        partial_manifest: dict[str, dict[str, int]],
+    ) -> bool:
+        # finished by an interrupted extraction of the same zip, a member cut off while written is smaller
+        if partial_manifest.get(info.filename) != {
+            "size": info.file_size,
+            "crc": info.CRC,
+        }:
+            return False
+        if not Extractor._is_safe_target(info, partial_folder):
+            return False
+        target = partial_folder / info.filename
+        return target.is_file() and target.stat().st_size == info.file_size
+
+    @staticmethod
+    def _link(
+        info: zipfile.ZipInfo,
+        partial_folder: Path,
+        previous_files: dict[tuple[str, int, int], Path],
+    ) -> bool:
+        source = previous_files.get((info.filename, info.file_size, info.CRC))
+        if source is None:
+            return False
+        if not Extractor._is_safe_target(info, partial_folder):
+            return False
+        target = partial_folder / info.filename
+        try:
+            # e.g. deleted since the manifest was written
+            if source.stat().st_size != info.file_size:
+                return False
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.link(source, target)
+        except OSError:
+            return False
+        return True
+
+    @staticmethod
+    def _is_safe_target(info: zipfile.ZipInfo, folder: Path) -> bool:
+        # unusual names are left to the sanitization of zipfile
+        return (folder / info.filename).resolve().is_relative_to(folder.resolve())
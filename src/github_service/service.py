@@ -1,27 +1,26 @@
 import asyncio
-import base64
 import enum
 import logging
 import sys
-import zipfile
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import github
-import requests
 from github.Commit import Commit
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from visual_regression_tracker import (
     Client,
     ClientConfig,
     Config,
-    TestRun,
     VisualRegressionTracker,
     types,
 )
 
+from github_service.artifact_cache import ArtifactCache
+from github_service.baseline_index import BaselineIndex
+from github_service.downloader import Downloader
+from github_service.extractor import Extractor
+from github_service.vrt_uploader import VRTUploader
 from robot.__main__ import RobotArguments, async_main
 from robot.config import get_data_dir, get_screenshot_dir
 
@@ -37,6 +36,12 @@ class GithubServiceConfig:
     vrt_frontend_url: str | None = None
     vrt_email: str | None = None
     vrt_password: str | None = None
+    # concurrent screenshot uploads
+    vrt_upload_workers: int = 4
+    # screenshots identical to their accepted baseline are uploaded again after this many days
+    vrt_verify_interval_days: float = 7
+    # builds beyond this size are deleted, least recently used first
+    artifact_cache_quota_gb: float = 50
 
 
 @dataclass
@@ -93,6 +98,15 @@ class Service:
         config: GithubServiceConfig,
     ):
         self.config = config
+        self.downloader = Downloader()
+        self.extractor = Extractor(self.downloader)
+        self.baseline_index = BaselineIndex(
+            verify_interval=config.vrt_verify_interval_days * 24 * 3600
+        )
+        self.artifact_cache = ArtifactCache(
+            quota_bytes=config.artifact_cache_quota_gb * 1e9
+        )
+        self.artifact_cache.scan()
         self.repo = github.Github(login_or_token=config.github_pat).get_repo(
             "Cynteract/cynteract-app"
         )
@@ -175,26 +189,53 @@ class Service:
             with VisualRegressionTracker(config) as vrt:
                 build_result.build_url = f"{self.config.vrt_frontend_url}/{vrt.projectId}?buildId={vrt.buildId}"
                 screenshot_dir = get_screenshot_dir(version)
-                for image_path in screenshot_dir.glob("*.png"):
-                    with image_path.open("rb") as f:
-                        image_data = f.read()
-                        imagebase64 = base64.b64encode(image_data).decode("utf-8")
-                        result = vrt.track(
-                            TestRun(
-                                name=image_path.stem,
-                                imageBase64=imagebase64,
-                                diffTollerancePercent=0.2,
-                            )
-                        )
-                        match result.testRunResponse.status:
-                            case types.TestRunStatus.OK:
-                                build_result.ok_count += 1
-                            case types.TestRunStatus.UNRESOLVED:
-                                build_result.unresolved_count += 1
-                            case types.TestRunStatus.NEW:
-                                build_result.new_count += 1
-                    # yield
-                    await asyncio.sleep(0)
+                image_paths = sorted(screenshot_dir.glob("*.png"))
+                hashes = await asyncio.gather(
+                    *(
+                        asyncio.to_thread(BaselineIndex.hash_file, image_path)
+                        for image_path in image_paths
+                    )
+                )
+                image_hashes = {
+                    image_path.stem: image_hash
+                    for image_path, image_hash in zip(image_paths, hashes)
+                }
+                changed_image_paths = []
+                for image_path in image_paths:
+                    if self.baseline_index.is_unchanged(
+                        branch, image_path.stem, image_hashes[image_path.stem]
+                    ):
+                        build_result.ok_count += 1
+                    else:
+                        changed_image_paths.append(image_path)
+                logging.info(
+                    f"Upload {len(changed_image_paths)} screenshots, {build_result.ok_count} unchanged."
+                )
+                try:
+                    with VRTUploader(
+                        api_url=self.config.vrt_api_url,
+                        api_key=self.config.vrt_api_key,
+                        project=config.project,
+                        build_id=vrt.buildId,
+                        project_id=vrt.projectId,
+                        branch=branch,
+                        workers=self.config.vrt_upload_workers,
+                    ) as uploader:
+                        async for result in uploader.upload_all(changed_image_paths):
+                            match result.status:
+                                case types.TestRunStatus.OK:
+                                    build_result.ok_count += 1
+                                    self.baseline_index.record(
+                                        branch, result.name, image_hashes[result.name]
+                                    )
+                                case types.TestRunStatus.UNRESOLVED:
+                                    build_result.unresolved_count += 1
+                                    logging.info(f"Difference found: {result.url} .")
+                                case types.TestRunStatus.NEW:
+                                    build_result.new_count += 1
+                                    logging.info(f"No baseline: {result.url} .")
+                finally:
+                    self.baseline_index.save()
         return build_result
 
     async def get_commit_details(self, commit: Commit) -> _CommitDetails:
@@ -225,30 +266,6 @@ class Service:
         )
         return details
 
-    async def download_file(self, url: str, file_path: Path) -> None:
-        """Download a file with retry logic on connection errors."""
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        session = requests.Session()
-        adapter = HTTPAdapter(
-            max_retries=Retry(
-                total=3,
-                backoff_factor=1,
-                status_forcelist=[429, 500, 502, 503, 504],
-                allowed_methods=["GET"],
-            )
-        )
-        session.mount("https://", adapter)
-        try:
-            response = session.get(url, stream=True, timeout=60)
-            response.raise_for_status()
-            with open(file_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=32768):
-                    if chunk:
-                        f.write(chunk)
-        except Exception as e:
-            file_path.unlink(missing_ok=True)
-            raise RuntimeError(f"Failed to download from {url}: {e}") from e
-
     async def run_commit_test(self, version: str, branch: str) -> TestResult:
         try:
             # run robot
@@ -259,13 +276,18 @@ class Service:
 
             # upload screenshots
             vrt_result = await self.upload_screenshots(version, branch)
+            # account for the screenshots and reports
+            self.artifact_cache.touch(version)
             if vrt_result.unresolved_count == 0 and vrt_result.new_count == 0:
+                self.artifact_cache.unpin(version)
                 return TestResult(
                     test_status=CommitTestStatus.SUCCESS,
                     details="All tests passed",
                     target_url=vrt_result.build_url,
                 )
             else:
+                # the screenshots are recorded as baseline once the review passes
+                self.artifact_cache.pin(version)
                 return TestResult(
                     test_status=CommitTestStatus.VRT_PENDING,
                     details=f"{vrt_result.unresolved_count} unresolved, {vrt_result.new_count} new images",
@@ -281,15 +303,35 @@ class Service:
     async def get_app_folder(self, version: str) -> Path:
         app_folder = get_data_dir(version) / f"Cynteract-{version}"
         if not app_folder.exists():
+            # consecutive builds share most files, they are linked from the recent builds
+            previous_folders = [
+                get_data_dir(previous) / f"Cynteract-{previous}"
+                for previous in self.artifact_cache.recently_used()[:3]
+                if previous != version
+            ]
             zip_path = app_folder.with_name(app_folder.name + ".zip")
-            if not zip_path.exists():
-                logging.info(f"Download {version}.")
+            if zip_path.exists():
+                logging.info(f"Extract build to {app_folder}/ .")
+                await asyncio.to_thread(
+                    self.extractor.extract_file, zip_path, app_folder, previous_folders
+                )
+            else:
+                logging.info(f"Download and extract {version} to {app_folder}/ .")
                 base_url = "https://storage.googleapis.com/cynteract-unity-auto-build"
                 download_url = f"{base_url}/windows/{zip_path.name}"
-                await self.download_file(download_url, zip_path)
-            logging.info(f"Extract build to {app_folder}/ .")
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                zip_ref.extractall(app_folder)
+                try:
+                    await asyncio.to_thread(
+                        self.extractor.extract_url,
+                        download_url,
+                        app_folder,
+                        previous_folders,
+                    )
+                except Exception as e:
+                    raise RuntimeError(
+                        f"Failed to download from {download_url}: {e}"
+                    ) from e
+        self.artifact_cache.touch(version)
+        self.artifact_cache.evict(keep=version)
         return app_folder
 
     async def process_commit(
@@ -362,7 +404,14 @@ class Service:
             # check if human review is done
             build = self.vrt_client.get_build(ciBuildId=commit_details.version)
             if build.status == "passed":
-                # all done
+                # all done, the reviewed screenshots are the new baseline
+                await asyncio.to_thread(
+                    self.baseline_index.record_dir,
+                    commit_details.branch,
+                    get_screenshot_dir(commit_details.version),
+                )
+                self.baseline_index.save()
+                self.artifact_cache.unpin(commit_details.version)
                 commit_status = commit.create_status(
                     state="success",
                     context="visual regression test",
@@ -374,10 +423,12 @@ class Service:
                 logging.info(f"VRT success.")
                 return CommitTestStatus.SUCCESS
             elif build.status == "unresolved" or build.status == "new":
-                # still pending
+                # still pending, pinned again in case the index was lost
+                self.artifact_cache.pin(commit_details.version)
                 return CommitTestStatus.VRT_PENDING
             elif build.status == "failed":
                 # failed
+                self.artifact_cache.unpin(commit_details.version)
                 commit_status = commit.create_status(
                     state="failure",
                     context="visual regression test",
@@ -0,0 +1,159 @@
+import base64
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from github_service.downloader import Downloader
+
+chunk_size = 1000
+content = bytes(range(256)) * 41
+
+
+class StubStorage(BaseHTTPRequestHandler):
+    """
+    Serves `content` like a storage bucket, with or without range support.
+    """
+
+    protocol_version = "HTTP/1.1"
+    ranges = True
+    etag = '"v1"'
+    md5: str | None = None
+    # sent as Content-Length on HEAD instead of the actual size
+    head_size: int | None = None
+    requests: list[str | None] = []
+    lock = threading.Lock()
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self._send_headers(
+            self.head_size if self.head_size is not None else len(content)
+        )
+
+    def do_GET(self):
+        byte_range = self.headers.get("Range")
+        with self.lock:
+            StubStorage.requests.append(byte_range)
+        if byte_range is not None and self.ranges:
+            first, last = map(
+                int, re.fullmatch(r"bytes=(\d+)-(\d+)", byte_range).groups()
+            )
+            body = content[first : last + 1]
+            self.send_response(206)
+        else:
+            body = content
+            self.send_response(200)
+        self._send_headers(len(body))
+        self.wfile.write(body)
+
+    def _send_headers(self, length: int):
+        self.send_header("Content-Length", str(length))
+        if self.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", self.etag)
+        if self.md5 is not None:
+            self.send_header("x-goog-hash", f"crc32c=AAAAAA==,md5={self.md5}")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    StubStorage.ranges = True
+    StubStorage.etag = '"v1"'
+    StubStorage.md5 = base64.b64encode(hashlib.md5(content).digest()).decode()
+    StubStorage.head_size = None
+    StubStorage.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubStorage)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/build.zip"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def downloader():
+    return Downloader(workers=3, chunk_size=chunk_size)
+
+
+def write_partial(file_path: Path, url: str, etag: str, completed_chunks: list[int]):
+    # the state an interrupted download leaves behind
+    part = bytearray(len(content))
+    for chunk in completed_chunks:
+        start = chunk * chunk_size
+        part[start : start + chunk_size] = content[start : start + chunk_size]
+    file_path.with_name(file_path.name + ".part").write_bytes(part)
+    file_path.with_name(file_path.name + ".part.json").write_text(
+        json.dumps(
+            {
+                "url": url,
+                "size": len(content),
+                "validator": etag,
+                "chunk_size": chunk_size,
+                "completed_chunks": completed_chunks,
+            }
+        )
+    )
+
+
+def test_range_download(url: str, downloader: Downloader, tmp_path: Path):
+    file_path = tmp_path / "build.zip"
+    stats = downloader.download(url, file_path)
+    assert file_path.read_bytes() == content
+    assert stats.downloaded_bytes == len(content)
+    assert len(StubStorage.requests) == 11
+    assert all(request is not None for request in StubStorage.requests)
+    assert not file_path.with_name("build.zip.part").exists()
+    assert not file_path.with_name("build.zip.part.json").exists()
+
+
+def test_resume(url: str, downloader: Downloader, tmp_path: Path):
+    file_path = tmp_path / "build.zip"
+    write_partial(file_path, url, '"v1"', [0, 1, 2, 5])
+    stats = downloader.download(url, file_path)
+    assert file_path.read_bytes() == content
+    assert stats.resumed_bytes == 4 * chunk_size
+    assert len(StubStorage.requests) == 7
+    assert "bytes=0-999" not in StubStorage.requests
+
+
+def test_changed_etag_restarts(url: str, downloader: Downloader, tmp_path: Path):
+    file_path = tmp_path / "build.zip"
+    write_partial(file_path, url, '"v0"', [0, 1, 2, 5])
+    stats = downloader.download(url, file_path)
+    assert file_path.read_bytes() == content
+    assert stats.resumed_bytes == 0
+    assert len(StubStorage.requests) == 11
+
+
+def test_md5_mismatch(url: str, downloader: Downloader, tmp_path: Path):
+    StubStorage.md5 = base64.b64encode(hashlib.md5(b"other").digest()).decode()
+    file_path = tmp_path / "build.zip"
+    with pytest.raises(RuntimeError, match="Checksum mismatch"):
+        downloader.download(url, file_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_size_mismatch(url: str, downloader: Downloader, tmp_path: Path):
+    StubStorage.ranges = False
+    StubStorage.head_size = len(content) + 10
+    file_path = tmp_path / "build.zip"
+    with pytest.raises(RuntimeError, match="Expected"):
+        downloader.download(url, file_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_single_stream(url: str, downloader: Downloader, tmp_path: Path):
+    StubStorage.ranges = False
+    file_path = tmp_path / "build.zip"
+    stats = downloader.download(url, file_path)
+    assert file_path.read_bytes() == content
+    assert stats.downloaded_bytes == len(content)
+    assert StubStorage.requests == [None]
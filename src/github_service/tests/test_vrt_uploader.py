@@ -0,0 +1,131 @@
+import email
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from visual_regression_tracker import types
+
+from github_service.vrt_uploader import VRTUploader
+
+
+class StubVRT(BaseHTTPRequestHandler):
+    """
+    Accepts multipart uploads like the VRT API and records the parsed form fields.
+    """
+
+    protocol_version = "HTTP/1.1"
+    uploads: dict[str, dict[str, bytes]] = {}
+    headers_seen: list[dict[str, str]] = []
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        if self.path != "/test-runs/multipart":
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        with self.lock:
+            StubVRT.active += 1
+            StubVRT.max_active = max(StubVRT.max_active, StubVRT.active)
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        message = email.message_from_bytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+        )
+        fields = {
+            part.get_param("name", header="content-disposition"): part.get_payload(
+                decode=True
+            )
+            for part in message.get_payload()
+        }
+        # keeps the requests open long enough to overlap
+        time.sleep(0.1)
+        with self.lock:
+            StubVRT.uploads[fields["name"].decode()] = fields
+            StubVRT.headers_seen.append(dict(self.headers))
+            StubVRT.active -= 1
+        content = json.dumps(
+            {"status": "ok", "url": f"/test-runs/{fields['name'].decode()}"}
+        ).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def vrt_url():
+    StubVRT.uploads = {}
+    StubVRT.headers_seen = []
+    StubVRT.active = 0
+    StubVRT.max_active = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubVRT)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def image_paths(tmp_path: Path) -> list[Path]:
+    paths = []
+    for i in range(10):
+        path = tmp_path / f"screenshot_{i}.png"
+        path.write_bytes(bytes(range(256)) * (100 * (i + 1)))
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.asyncio
+async def test_upload_all(vrt_url: str, image_paths: list[Path]):
+    with VRTUploader(
+        vrt_url,
+        api_key="key",
+        project="project",
+        build_id="build",
+        project_id="project_id",
+        branch="feature",
+        diff_tolerance_percent=0.5,
+        workers=3,
+    ) as uploader:
+        results = [result async for result in uploader.upload_all(image_paths)]
+
+    assert sorted(result.name for result in results) == sorted(
+        path.stem for path in image_paths
+    )
+    assert all(result.status == types.TestRunStatus.OK for result in results)
+    for path in image_paths:
+        fields = StubVRT.uploads[path.stem]
+        assert fields["image"] == path.read_bytes()
+        assert fields["buildId"] == b"build"
+        assert fields["projectId"] == b"project_id"
+        assert fields["branchName"] == b"feature"
+        assert fields["diffTollerancePercent"] == b"0.5"
+    for headers in StubVRT.headers_seen:
+        assert headers["apiKey"] == "key"
+        assert headers["project"] == "project"
+        assert "Transfer-Encoding" not in headers
+    assert 1 < StubVRT.max_active <= 3
+
+
+def test_upload_error(vrt_url: str, image_paths: list[Path]):
+    with VRTUploader(
+        vrt_url + "/missing",
+        api_key="key",
+        project="project",
+        build_id="build",
+        project_id="project_id",
+        branch="feature",
+    ) as uploader:
+        with pytest.raises(RuntimeError, match="Failed to upload screenshot_0.png"):
+            uploader.upload(image_paths[0])
@@ -0,0 +1,177 @@
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from visual_regression_tracker import types
+
+
+@dataclass
+class UploadResult:
+    name: str
+    status: types.TestRunStatus
+    url: str | None
+
+
+class _MultipartBody:
+    """
+    A multipart/form-data body with a single image part that is read from disk while it is sent.
+    The length is known in advance, so the request is sent with a Content-Length instead of chunked.
+    """
+
+    def __init__(self, fields: dict[str, str], image_path: Path):
+        self.boundary = uuid.uuid4().hex
+        preamble = b""
+        for key, value in fields.items():
+            preamble += (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{key}"\r\n\r\n'
+                f"{value}\r\n"
+            ).encode()
+        preamble += (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="image"; filename="{image_path.name}"\r\n'
+            f"Content-Type: image/png\r\n\r\n"
+        ).encode()
+        self._parts = [preamble, None, f"\r\n--{self.boundary}--\r\n".encode()]
+        self._image_path = image_path
+        self._length = len(preamble) + image_path.stat().st_size + len(self._parts[2])
+        self._part = 0
+        self._offset = 0
+        self._file = None
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        chunks = []
+        while self._part < len(self._parts) and size != 0:
+            part = self._parts[self._part]
+            if part is None:
+                if self._file is None:
+                    self._file = open(self._image_path, "rb")
+                chunk = self._file.read(size)
+                if not chunk or size < 0:
+                    self._file.close()
+                    self._part += 1
+            else:
+                end = len(part) if size < 0 else self._offset + size
+                chunk = part[self._offset : end]
+                self._offset += len(chunk)
+                if self._offset == len(part):
+                    self._part += 1
+                    self._offset = 0
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+class VRTUploader:
+    """
+    Uploads screenshots of a started VRT build concurrently.
+    The images are sent as multipart uploads streamed from disk over a shared connection pool.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        api_key: str,
+        project: str,
+        build_id: str,
+        project_id: str,
+        branch: str,
+        diff_tolerance_percent: float = 0.2,
+        workers: int = 4,
+    ):
+        self.api_url = api_url
+        self.build_id = build_id
+        self.project_id = project_id
+        self.branch = branch
+        self.diff_tolerance_percent = diff_tolerance_percent
+        self.workers = workers
+        self.session = requests.Session()
+        self.session.headers.update({"apiKey": api_key, "project": project})
+        # the body is consumed while it is sent, only failed connects can be retried
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=workers,
+            max_retries=Retry(
+                total=None, connect=3, read=0, status=0, other=0, backoff_factor=1
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="vrt-upload"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.session.close()
+
+    def upload(self, image_path: Path) -> UploadResult:
+        body = _MultipartBody(
+            {
+                "name": image_path.stem,
+                "buildId": self.build_id,
+                "projectId": self.project_id,
+                "branchName": self.branch,
+                "diffTollerancePercent": str(self.diff_tolerance_percent),
+            },
+            image_path,
+        )
+        try:
+            response = self.session.post(
+                f"{self.api_url}/test-runs/multipart",
+                data=body,
+                headers={"Content-Type": body.content_type},
+                timeout=60,
+            )
+        finally:
+            body.close()
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f"Failed to upload {image_path.name}: {response.status_code} {response.text}"
+            )
+        result = response.json()
+        return UploadResult(
+            name=image_path.stem,
+            status=types.TestRunStatus(result["status"]),
+            url=result.get("url"),
+        )
+
+    async def upload_all(self, image_paths: list[Path]) -> AsyncIterator[UploadResult]:
+        """
+        Uploads the images with a bounded number of concurrent requests and yields the results as they complete.
+        """
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(self.executor, self.upload, image_path)
+            for image_path in image_paths
+        ]
+        try:
+            for future in asyncio.as_completed(futures):
+                yield await future
+        finally:
+            for future in futures:
+                future.cancel()
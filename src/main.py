@@ -39,6 +39,7 @@ async def main():
         vrt_frontend_url=env.get("VRT_FRONTEND_URL"),
         vrt_email=env.get("VRT_ADMIN_EMAIL"),
         vrt_password=env.get("VRT_ADMIN_PASSWORD"),
+        artifact_cache_quota_gb=float(env.get("ARTIFACT_CACHE_QUOTA_GB", 50)),
     )
     await github_service_main(github_service_args)
 
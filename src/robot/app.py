@@ -1,27 +1,115 @@
 import asyncio
 import logging
+import os
 import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, TypeVar
 
 import cv2
 import numpy
-import PIL.ImageGrab
 import psutil
-import pywinctl
-import win32gui
 from cv2.typing import MatLike
 
+from robot.capture_scheduler import CaptureScheduler
+from robot.frame_fingerprint import FrameFingerprint, UnchangedMissCache
+from robot.frame_source import FrameSource, LiveFrameSource
+from robot.region_hints import region_hints
+from robot.template_store import template_store
 from robot.timeout import Timeout
+from robot.tracing import tracer
+
+if TYPE_CHECKING:
+    import pywinctl
+
+T = TypeVar("T")
 
 
 class MultipleMatchesFoundException(Exception):
     pass
 
 
+# more locations above the confidence are treated as a non-distinctive template
+MAX_MATCH_LOCATIONS = 20
+
+
+@dataclass
+class Match:
+    # (x1, y1, x2, y2)
+    bbox: tuple[int, int, int, int]
+    confidence: float
+
+    def offset(self, x: int, y: int) -> "Match":
+        return Match(
+            bbox=(
+                self.bbox[0] + x,
+                self.bbox[1] + y,
+                self.bbox[2] + x,
+                self.bbox[3] + y,
+            ),
+            confidence=self.confidence,
+        )
+
+
+@dataclass
+class Peak:
+    x: int
+    y: int
+    score: float
+
+
+def find_match_locations(
+    match: MatLike, confidence: float
+) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray] | None:
+    """
+    Returns the (y, x, score) arrays of all locations in a matchTemplate result with at least the given confidence.
+    Returns None if there are more than MAX_MATCH_LOCATIONS, without collecting them.
+    """
+    _, max_value, _, _ = cv2.minMaxLoc(match)
+    if max_value < confidence:
+        empty = numpy.empty(0, dtype=numpy.intp)
+        return empty, empty, numpy.empty(0, dtype=numpy.float32)
+    mask = match >= confidence
+    if numpy.count_nonzero(mask) > MAX_MATCH_LOCATIONS:
+        return None
+    yloc, xloc = numpy.nonzero(mask)
+    return yloc, xloc, match[yloc, xloc]
+
+
+def find_peaks(
+    yloc: numpy.ndarray,
+    xloc: numpy.ndarray,
+    scores: numpy.ndarray,
+    distance: int = 4,
+) -> list[Peak]:
+    """
+    Non-maximum suppression of match locations. Locations closer than the given pixel distance to a better location are dropped.
+
+    Returns: the remaining peaks, best first
+    """
+    order = numpy.argsort(-scores, kind="stable")
+    xloc = xloc[order]
+    yloc = yloc[order]
+    scores = scores[order]
+    # pairwise neighbourhood, i suppresses j if i is better and within the distance
+    near = (numpy.abs(xloc[:, None] - xloc[None, :]) < distance) & (
+        numpy.abs(yloc[:, None] - yloc[None, :]) < distance
+    )
+    suppressed = numpy.zeros(len(order), dtype=bool)
+    peaks: list[Peak] = []
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        peaks.append(Peak(x=int(xloc[i]), y=int(yloc[i]), score=float(scores[i])))
+        suppressed |= near[i]
+    return peaks
+
+
 @dataclass
 class WindowMatcher:
     pid: int | None = None
@@ -39,7 +127,8 @@ class AppState(Enum):
 class App:
     pid: int | None = None
     window_matcher: WindowMatcher | None = None
-    window: pywinctl.Window | None = None
+    window: "pywinctl.Window | None" = None
+    frame_source: FrameSource | None = None
     enforce_size_task: asyncio.Task | None = None
     requested_client_frame_size: tuple[int, int] | None = None
     resize_offsets: tuple[int, int] | None = None
@@ -51,8 +140,40 @@ class App:
     @dataclass
     class ImageCache:
         gray_image: MatLike
-
-    cached_large_image: ImageCache | None = None
+        # position on the screen, only known for grabbed images
+        bbox: tuple[int, int, int, int] | None = None
+        fingerprint: FrameFingerprint | None = None
+
+    # grabs of the whole window younger than this are shared between callers, in seconds
+    capture_max_age: float = 0.1
+
+    # threads for screen grabs and template matching, OpenCV releases the GIL
+    worker_count: int = min(8, os.cpu_count() or 1)
+
+    # skip matching while the searched part of the screen is unchanged since the last miss
+    skip_unchanged_matches: bool = True
+
+    # opt-in coarse-to-fine matching, each level halves the resolution
+    pyramid_matching: bool = False
+    pyramid_levels: int = 1
+    # smallest template side length at the coarse level
+    pyramid_min_template_size: int = 8
+    # confidence slack at the coarse level
+    pyramid_margin: float = 0.3
+    # number of coarse peaks refined at full resolution
+    pyramid_max_candidates: int = 8
+
+    def __init__(self):
+        self.unchanged_misses = UnchangedMissCache()
+        self._fingerprint_lock = threading.Lock()
+        # templates whose hinted region was already checked against the whole window for multiple matches
+        self.verified_hints: set[tuple[Path, float]] = set()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.worker_count, thread_name_prefix="robot-worker"
+        )
+        self.capture_scheduler = CaptureScheduler(
+            lambda: self.run_in_worker(self._get_large_image)
+        )
 
     async def __aenter__(self):
         return self
@@ -64,6 +185,16 @@ class App:
                 await self.enforce_size_task
             except asyncio.CancelledError:
                 pass
+        # matches of cancelled awaits may still be running, don't wait for them
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run_in_worker(self, func: Callable[..., T], *args) -> T:
+        """
+        Runs the given function on the worker pool without blocking the event loop.
+        Cancelling the await drops the call if it has not started yet.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
 
     async def find_by_window(self, window_matcher: WindowMatcher, timeout: float = 5):
         """
@@ -147,6 +278,9 @@ class App:
             timeout,
             f"No app window found for {self.file_path} within {timeout} seconds",
         )
+        # window management is only available on desktops
+        import pywinctl
+
         while self.window is None:
             for window in pywinctl.getAllWindows():
                 is_ok = True
@@ -158,12 +292,15 @@ class App:
                 elif _title is not None and _title != window.title:
                     is_ok = False
                 elif _class_name is not None:
+                    import win32gui
+
                     hwnd = window.getHandle()
                     class_name = win32gui.GetClassName(hwnd)
                     if class_name != _class_name:
                         is_ok = False
                 if is_ok:
                     self.window = window
+                    self.frame_source = LiveFrameSource(window)
             if self.window is None:
                 timer.check()
                 await asyncio.sleep(0.5)
@@ -212,6 +349,8 @@ class App:
         self.state = AppState.Closed
         self.pid = None
         self.window = None
+        self.frame_source = None
+        self.capture_scheduler.invalidate()
 
     def enforce_size(self):
         """
@@ -276,63 +415,43 @@ class App:
         """
         Takes a screenshot of the app window and saves it to the given path.
         """
-        assert self.window, "App window is not available. Call open() first."
+        assert self.frame_source, "App window is not available. Call open() first."
         bbox = self._get_bounding_box()
-        with PIL.ImageGrab.grab(bbox=bbox) as img:
+        with self.frame_source.grab(bbox) as img:
             img.save(save_path)
 
     def _get_bounding_box(self) -> tuple[int, int, int, int]:
         """
         Returns the bounding box of the app window.
         """
-        assert self.window, "App window is not available. Call open() first."
-        client_frame = self.window.getClientFrame()
-        return (
-            client_frame.left,
-            client_frame.top,
-            client_frame.right,
-            client_frame.bottom,
-        )
+        assert self.frame_source, "App window is not available. Call open() first."
+        return self.frame_source.get_bounding_box()
 
     def _get_large_image(
         self, bbox: tuple[int, int, int, int] | None = None
     ) -> ImageCache:
-        if bbox is None:
-            bbox = self._get_bounding_box()
-        # load images, cv2 uses numpy arrays in BGR format
-        # grabbing window only does not work on all windows, see https://github.com/python-pillow/Pillow/pull/8516#issuecomment-3794640267
-        with PIL.ImageGrab.grab(bbox=bbox) as window_grab:
-            if self.debug_dir is not None:
-                image_grab_dir = self.debug_dir / "image_grab"
-                image_grab_dir.mkdir(parents=True, exist_ok=True)
-                timestamp = (
-                    datetime.now().isoformat(timespec="milliseconds").replace(":", "-")
-                )
-                window_grab.save(image_grab_dir / f"screenshot_{timestamp}.png")
-            window_image = numpy.array(window_grab)
-            # convert to grayscale
-            gray_image = cv2.cvtColor(window_image, cv2.COLOR_RGB2GRAY)
-            return self.ImageCache(gray_image=gray_image)
+        assert self.frame_source, "App window is not available. Call open() first."
+        with tracer.span("grab", "grab"):
+            if bbox is None:
+                bbox = self._get_bounding_box()
+            # load images, cv2 uses numpy arrays in BGR format
+            with self.frame_source.grab(bbox) as window_grab:
+                if self.debug_dir is not None:
+                    image_grab_dir = self.debug_dir / "image_grab"
+                    image_grab_dir.mkdir(parents=True, exist_ok=True)
+                    timestamp = (
+                        datetime.now()
+                        .isoformat(timespec="milliseconds")
+                        .replace(":", "-")
+                    )
+                    window_grab.save(image_grab_dir / f"screenshot_{timestamp}.png")
+                window_image = numpy.array(window_grab)
+                # convert to grayscale
+                gray_image = cv2.cvtColor(window_image, cv2.COLOR_RGB2GRAY)
+                return self.ImageCache(gray_image=gray_image, bbox=bbox)
 
     def _get_small_image(self, path: Path) -> ImageCache:
-        image = cv2.imread(str(path))
-        assert image is not None, f"Could not load small image at {path}"
-        gray_image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-        return self.ImageCache(gray_image=gray_image)
-
-    class _CachedScreenshot:
-        def __init__(self, app: "App"):
-            self.app = app
-
-        def __enter__(self):
-            self.app.cached_large_image = self.app._get_large_image()
-            return self.app.cached_large_image
-
-        def __exit__(self, exc_type, exc_val, exc_tb):
-            self.app.cached_large_image = None
-
-    def cached_screenshot(self) -> _CachedScreenshot:
-        return self._CachedScreenshot(self)
+        return self.ImageCache(gray_image=template_store.get(path))
 
     def _debug_save_images(
         self,
@@ -344,6 +463,48 @@ class App:
         cv2.imwrite(str(target_dir / f"small.png"), small_image.gray_image)
         cv2.imwrite(str(target_dir / f"large.png"), large_image.gray_image)
 
+    def _get_region_bbox(
+        self, region: tuple[float, float, float, float]
+    ) -> tuple[int, int, int, int]:
+        """
+        Converts a region relative to the app window into absolute screen coordinates.
+        """
+        window_bbox = self._get_bounding_box()
+        return (
+            int(window_bbox[0] + region[0] * (window_bbox[2] - window_bbox[0])),
+            int(window_bbox[1] + region[1] * (window_bbox[3] - window_bbox[1])),
+            int(window_bbox[0] + region[2] * (window_bbox[2] - window_bbox[0])),
+            int(window_bbox[1] + region[3] * (window_bbox[3] - window_bbox[1])),
+        )
+
+    async def grab(
+        self, region: tuple[float, float, float, float] | None = None
+    ) -> tuple[ImageCache, tuple[int, int, int, int]]:
+        """
+        Grabs the given region of the app window (default: the whole window). Regions are cropped from a shared grab of the whole window, see capture_max_age.
+
+        Returns: the grabbed image and its (x1, y1, x2, y2) on the screen
+        """
+        assert self.frame_source, "App window is not available. Call open() first."
+
+        # enforce size before taking screenshot
+        if self.enforce_size_task != None and self.window and self.window.isMaximized:
+            await self._enforce_size_once()
+
+        frame = await self.capture_scheduler.get_frame(self.capture_max_age)
+        assert frame.bbox is not None
+        if region is None or region == (0, 0, 1.0, 1.0):
+            return frame, frame.bbox
+        image, (x, y) = self.crop(frame, region)
+        height, width = image.gray_image.shape[:2]
+        image.bbox = (
+            frame.bbox[0] + x,
+            frame.bbox[1] + y,
+            frame.bbox[0] + x + width,
+            frame.bbox[1] + y + height,
+        )
+        return image, image.bbox
+
     async def locate(
         self,
         small_image_path: Path,
@@ -355,11 +516,164 @@ class App:
 
         Returns: (x1, y1, x2, y2) of the found image on the screen or None
         """
-        assert self.window, "App window is not available. Call open() first."
-        if confidence is None:
-            confidence = 0.9
-        if region is None:
-            region = (0, 0, 1.0, 1.0)
+        match = await self.locate_match(small_image_path, confidence, region)
+        return match.bbox if match is not None else None
+
+    async def locate_match(
+        self,
+        small_image_path: Path,
+        confidence: float | None = 0.9,
+        region: tuple[float, float, float, float] | None = None,
+    ) -> Match | None:
+        """
+        Like locate(), but returns the best match together with its confidence.
+        Without a region, a declared or learned region of the image is searched first. The first hit there is checked against the whole window,
+        later hits are returned without that check, so a second occurrence of the image outside the region no longer raises MultipleMatchesFoundException.
+        """
+        with tracer.span(f"locate {small_image_path.name}", "locate"):
+            if confidence is None:
+                confidence = 0.9
+            if region is not None:
+                return await self._locate_in_region(
+                    small_image_path, confidence, region
+                )
+
+            # try the declared or learned region first, fall back to the whole window
+            found = None
+            hint = region_hints.get(small_image_path)
+            if hint is not None and self._fits_region(small_image_path, hint):
+                found = await self._locate_in_region(small_image_path, confidence, hint)
+                if found is not None and self.needs_hint_check(
+                    small_image_path, confidence
+                ):
+                    # raises if the image occurs elsewhere as well
+                    await self._locate_in_region(
+                        small_image_path, confidence, (0, 0, 1.0, 1.0)
+                    )
+            if found is None:
+                found = await self._locate_in_region(
+                    small_image_path, confidence, (0, 0, 1.0, 1.0)
+                )
+            if found is not None:
+                region_hints.observe(
+                    small_image_path, self._get_relative_region(found.bbox)
+                )
+            return found
+
+    async def _locate_in_region(
+        self,
+        small_image_path: Path,
+        confidence: float,
+        region: tuple[float, float, float, float],
+    ) -> Match | None:
+        # match within the shared frame, so its fingerprint is reused as well
+        frame, bbox = await self.grab()
+        match = await self.run_in_worker(
+            self.match, frame, small_image_path, confidence, region
+        )
+        if match is None:
+            return None
+        return match.offset(bbox[0], bbox[1])
+
+    def needs_hint_check(self, small_image_path: Path, confidence: float) -> bool:
+        """
+        Returns True once per image and confidence, for the first hit in its hinted region.
+        """
+        key = (small_image_path, confidence)
+        if key in self.verified_hints:
+            return False
+        self.verified_hints.add(key)
+        return True
+
+    def _fits_region(
+        self, small_image_path: Path, region: tuple[float, float, float, float]
+    ) -> bool:
+        bbox = self._get_region_bbox(region)
+        small_image = self._get_small_image(small_image_path)
+        return (
+            bbox[2] - bbox[0] >= small_image.gray_image.shape[1]
+            and bbox[3] - bbox[1] >= small_image.gray_image.shape[0]
+        )
+
+    def _get_relative_region(
+        self, bbox: tuple[int, int, int, int]
+    ) -> tuple[float, float, float, float]:
+        """
+        Converts absolute screen coordinates into a region relative to the app window.
+        """
+        window_bbox = self._get_bounding_box()
+        width = window_bbox[2] - window_bbox[0]
+        height = window_bbox[3] - window_bbox[1]
+        return (
+            (bbox[0] - window_bbox[0]) / width,
+            (bbox[1] - window_bbox[1]) / height,
+            (bbox[2] - window_bbox[0]) / width,
+            (bbox[3] - window_bbox[1]) / height,
+        )
+
+    @staticmethod
+    def crop(
+        large_image: ImageCache, region: tuple[float, float, float, float]
+    ) -> tuple[ImageCache, tuple[int, int]]:
+        """
+        Crops a region relative to the grabbed image.
+
+        Returns: the cropped image and its (x, y) offset in the grabbed image
+        """
+        height, width = large_image.gray_image.shape[:2]
+        x1, y1 = int(region[0] * width), int(region[1] * height)
+        x2, y2 = int(region[2] * width), int(region[3] * height)
+        cropped = App.ImageCache(gray_image=large_image.gray_image[y1:y2, x1:x2])
+        return cropped, (x1, y1)
+
+    def match(
+        self,
+        large_image: ImageCache,
+        small_image_path: Path,
+        confidence: float,
+        region: tuple[float, float, float, float] | None = None,
+    ) -> Match | None:
+        """
+        Matches the given image against an already grabbed image, optionally restricted to a region relative to the grabbed image. Returns the best match relative to the grabbed image if found, otherwise None.
+        """
+        with tracer.span(f"match {small_image_path.name}", "match"):
+            offset = (0, 0)
+            image = large_image
+            if region is not None:
+                image, offset = self.crop(large_image, region)
+            if not self.skip_unchanged_matches or large_image.bbox is None:
+                match = self._match(image, small_image_path, confidence)
+                return match.offset(*offset) if match is not None else None
+
+            # matches on the same frame run in parallel, the fingerprint is computed once
+            with self._fingerprint_lock:
+                if large_image.fingerprint is None:
+                    large_image.fingerprint = FrameFingerprint.of(
+                        large_image.gray_image, large_image.bbox
+                    )
+            key = (small_image_path, confidence)
+            rect = (
+                offset[0],
+                offset[1],
+                offset[0] + image.gray_image.shape[1],
+                offset[1] + image.gray_image.shape[0],
+            )
+            if self.unchanged_misses.is_unchanged_miss(
+                key, large_image.fingerprint, rect
+            ):
+                return None
+            match = self._match(image, small_image_path, confidence)
+            self.unchanged_misses.record(
+                key, large_image.fingerprint, rect, found=match is not None
+            )
+            return match.offset(*offset) if match is not None else None
+
+    def _match(
+        self,
+        large_image: ImageCache,
+        small_image_path: Path,
+        confidence: float,
+    ) -> Match | None:
         if self.debug_dir is not None:
             timestamp = (
                 datetime.now().isoformat(timespec="milliseconds").replace(":", "-")
@@ -370,23 +684,6 @@ class App:
         else:
             debug_save_dir = None
 
-        window_bbox = self._get_bounding_box()
-        bbox = (
-            int(window_bbox[0] + region[0] * (window_bbox[2] - window_bbox[0])),
-            int(window_bbox[1] + region[1] * (window_bbox[3] - window_bbox[1])),
-            int(window_bbox[0] + region[2] * (window_bbox[2] - window_bbox[0])),
-            int(window_bbox[1] + region[3] * (window_bbox[3] - window_bbox[1])),
-        )
-
-        # enforce size before taking screenshot
-        if self.enforce_size_task != None and self.window.isMaximized:
-            await self._enforce_size_once()
-
-        if self.cached_large_image is not None and region == (0, 0, 1.0, 1.0):
-            large_image = self.cached_large_image
-        else:
-            large_image = self._get_large_image(bbox=bbox)
-
         small_image = self._get_small_image(small_image_path)
         assert (
             large_image.gray_image.shape[0] >= small_image.gray_image.shape[0]
@@ -397,46 +694,115 @@ class App:
         if debug_save_dir is not None:
             self._debug_save_images(debug_save_dir, small_image, large_image)
 
-        # https://docs.opencv.org/4.13.0/d4/dc6/tutorial_py_template_matching.html
-        match = cv2.matchTemplate(
-            large_image.gray_image, small_image.gray_image, cv2.TM_CCOEFF_NORMED
-        )
-        yloc, xloc = numpy.where(match >= confidence)
-        if len(xloc) == 0:
-            return None
-        if len(xloc) > 20:
+        locations = None
+        if self.pyramid_matching:
+            locations = self._pyramid_match_locations(
+                large_image.gray_image, small_image.gray_image, confidence
+            )
+        if locations is None:
+            # https://docs.opencv.org/4.13.0/d4/dc6/tutorial_py_template_matching.html
+            match = cv2.matchTemplate(
+                large_image.gray_image, small_image.gray_image, cv2.TM_CCOEFF_NORMED
+            )
+            locations = find_match_locations(match, confidence)
+        if locations is None:
             raise MultipleMatchesFoundException(
-                f"Too many ({len(xloc)}) matches found for image {small_image_path} with confidence {confidence}"
+                f"Too many (>{MAX_MATCH_LOCATIONS}) matches found for image {small_image_path} with confidence {confidence}"
             )
-        # cluster matches with a pixel distance < 4
-        clustered_xloc: list[int] = []
-        clustered_yloc: list[int] = []
-        for x, y in zip(xloc, yloc):
-            # if any existing clustered point is within 4 pixels, skip this point
-            if any(
-                abs(x - cx) < 4 and abs(y - cy) < 4
-                for (cx, cy) in zip(clustered_xloc, clustered_yloc)
-            ):
-                continue
-            clustered_xloc.append(x)
-            clustered_yloc.append(y)
-        if len(clustered_xloc) > 1:
+        peaks = find_peaks(*locations)
+        if len(peaks) == 0:
+            return None
+        if len(peaks) > 1:
             raise MultipleMatchesFoundException(
-                f"Multiple ({len(clustered_xloc)}) matches found for image {small_image_path} with confidence {confidence}"
+                f"Multiple ({len(peaks)}) matches found for image {small_image_path} with confidence {confidence}"
             )
-        else:
-            return (
-                clustered_xloc[0] + bbox[0],
-                clustered_yloc[0] + bbox[1],
-                clustered_xloc[0] + bbox[0] + small_image.gray_image.shape[1],
-                clustered_yloc[0] + bbox[1] + small_image.gray_image.shape[0],
+        best = peaks[0]
+        return Match(
+            bbox=(
+                best.x,
+                best.y,
+                best.x + small_image.gray_image.shape[1],
+                best.y + small_image.gray_image.shape[0],
+            ),
+            confidence=best.score,
+        )
+
+    def _pyramid_match_locations(
+        self, large_gray: MatLike, small_gray: MatLike, confidence: float
+    ) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray] | None:
+        """
+        Finds all match locations with at least the given confidence by matching downscaled copies first and refining the best coarse peaks at full resolution.
+        Returns None if the coarse level is ambiguous, the caller should then match at full resolution.
+        """
+        scale = 2**self.pyramid_levels
+        if min(small_gray.shape[:2]) // scale < self.pyramid_min_template_size:
+            return None
+        small_height, small_width = small_gray.shape[:2]
+        match_height = large_gray.shape[0] - small_height + 1
+        match_width = large_gray.shape[1] - small_width + 1
+        coarse_large = self._downscale(large_gray, scale)
+        coarse_small = self._downscale(small_gray, scale)
+        coarse_match = cv2.matchTemplate(
+            coarse_large, coarse_small, cv2.TM_CCOEFF_NORMED
+        )
+
+        # local maxima, one per template sized neighbourhood
+        kernel = numpy.ones(
+            (coarse_small.shape[0] // 2 * 2 + 1, coarse_small.shape[1] // 2 * 2 + 1),
+            dtype=numpy.uint8,
+        )
+        peaks = coarse_match == cv2.dilate(coarse_match, kernel)
+        peak_y, peak_x = numpy.nonzero(peaks)
+        peak_scores = coarse_match[peak_y, peak_x]
+        order = numpy.argsort(-peak_scores)
+        candidates = order[: self.pyramid_max_candidates]
+        if len(order) > len(candidates):
+            # more areas could reach the confidence than we refine
+            next_score = peak_scores[order[len(candidates)]]
+            if next_score >= confidence - self.pyramid_margin:
+                return None
+
+        found: dict[tuple[int, int], float] = {}
+        for index in candidates:
+            # a coarse pixel covers `scale` full resolution positions, refine with slack on both sides
+            x1 = max(0, int(peak_x[index] - 2) * scale)
+            y1 = max(0, int(peak_y[index] - 2) * scale)
+            x2 = min(match_width, int(peak_x[index] + 3) * scale)
+            y2 = min(match_height, int(peak_y[index] + 3) * scale)
+            match = cv2.matchTemplate(
+                large_gray[y1 : y2 + small_height - 1, x1 : x2 + small_width - 1],
+                small_gray,
+                cv2.TM_CCOEFF_NORMED,
             )
+            locations = find_match_locations(match, confidence)
+            if locations is None:
+                return None
+            for fy, fx, score in zip(*locations):
+                found[(int(fy) + y1, int(fx) + x1)] = float(score)
+        if len(found) > MAX_MATCH_LOCATIONS:
+            return None
+        yloc = numpy.array([p[0] for p in found], dtype=numpy.intp)
+        xloc = numpy.array([p[1] for p in found], dtype=numpy.intp)
+        scores = numpy.array(list(found.values()), dtype=numpy.float32)
+        return yloc, xloc, scores
+
+    @staticmethod
+    def _downscale(image: MatLike, scale: int) -> MatLike:
+        height = image.shape[0] // scale
+        width = image.shape[1] // scale
+        return cv2.resize(
+            image[: height * scale, : width * scale],
+            (width, height),
+            interpolation=cv2.INTER_AREA,
+        )
 
     def get_screen_scale(self) -> int:
         """
         Returns the screen scale factor of the app window. This is relevant for high-DPI displays where the actual pixel size of the window can be larger than the logical size.
         """
         assert self.window, "App window is not available. Call open() first."
+        import pywinctl
+
         # get the logical and physical size of the window to calculate the scale factor
         screen_id = self.window.getDisplay()[0]
         all_screens = pywinctl.getAllScreens()
@@ -0,0 +1,57 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+if TYPE_CHECKING:
+    from robot.app import App
+
+
+@dataclass
+class CaptureStats:
+    grabs: int
+    reuses: int
+
+    def __str__(self) -> str:
+        return f"{self.grabs} grabs, {self.reuses} reused"
+
+
+class CaptureScheduler:
+    """
+    Hands out grabs of the whole app window. Callers asking within the max age of the last grab share it instead of grabbing again.
+    """
+
+    def __init__(self, grab: Callable[[], Awaitable["App.ImageCache"]]):
+        self._grab = grab
+        self._lock = asyncio.Lock()
+        self._frame: "App.ImageCache | None" = None
+        self._frame_time = 0.0
+        self.grabs = 0
+        self.reuses = 0
+
+    async def get_frame(self, max_age: float) -> "App.ImageCache":
+        """
+        Returns a frame that is at most max_age seconds old, grabbing a new one if necessary.
+        """
+        # concurrent callers wait for a running grab instead of starting their own
+        async with self._lock:
+            if (
+                self._frame is not None
+                and time.monotonic() - self._frame_time <= max_age
+            ):
+                self.reuses += 1
+                return self._frame
+            grab_time = time.monotonic()
+            self._frame = await self._grab()
+            self._frame_time = grab_time
+            self.grabs += 1
+            return self._frame
+
+    def invalidate(self) -> None:
+        """
+        Drops the last frame, e.g. after an input that changes the screen.
+        """
+        self._frame = None
+
+    def stats(self) -> CaptureStats:
+        return CaptureStats(grabs=self.grabs, reuses=self.reuses)
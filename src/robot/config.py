@@ -1,20 +1,14 @@
-from pathlib import Path
-
+# the path helpers are re-exported for existing imports
+from robot.paths import (
+    get_builds_download_dir,
+    get_cache_dir,
+    get_data_dir,
+    get_screenshot_dir,
+    get_small_image_dir,
+)
 from shared.utils import load_env_file
 
 
-def get_data_dir(test_id: str) -> Path:
-    return Path.home() / "Documents" / "visual_testing" / test_id
-
-
-def get_screenshot_dir(test_id: str) -> Path:
-    return get_data_dir(test_id) / "screenshots"
-
-
-def get_small_image_dir() -> Path:
-    return Path(__file__).parent / "tests" / "images"
-
-
 def get_frame_size() -> tuple[int, int]:
     # Cynteract app allows aspect ratios between 4:3 and 21:9 for window size, not considering window decorations.
     # Window decorations can vary between theme and screen scaling.
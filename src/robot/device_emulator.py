@@ -1,5 +1,3 @@
-import asyncio
-
 from pynput.keyboard import Controller
 
 from robot.device_types import DeviceTypes
@@ -7,9 +5,13 @@ from robot.player_log_monitor import PlayerLogMonitor
 from robot.state_machine import UIStateMachine
 from robot.states import UIState
 from robot.transitions import DefinedTransition
+from robot.utils import KeyPacing, type_batch
 
 
 class DeviceEmulator:
+    # the app parses emulator commands from the keys of a whole frame
+    pacing = KeyPacing(interval=0, settle=0.05)
+
     def __init__(
         self,
         keyboard: Controller,
@@ -47,31 +49,29 @@ class DeviceEmulator:
             self.state_machine.update_device(self.device_type)
 
     async def turn_left(self):
-        while self.rotation >= 0:
-            await self._type_text("+10x")
-            self.rotation -= 1
+        await self._rotate(min(0, -1 - self.rotation))
 
     async def turn_far_left(self):
-        while self.rotation >= -1:
-            await self._type_text("+10x")
-            self.rotation -= 1
+        await self._rotate(min(0, -2 - self.rotation))
 
     async def turn_right(self):
-        while self.rotation <= 0:
-            await self._type_text("-10x")
-            self.rotation += 1
+        await self._rotate(max(0, 1 - self.rotation))
 
     async def turn_far_right(self):
-        while self.rotation <= 1:
-            await self._type_text("-10x")
-            self.rotation += 1
+        await self._rotate(max(0, 2 - self.rotation))
+
+    async def _rotate(self, steps: int):
+        """
+        Rotates by the given number of 10° steps, positive is right. All steps are sent in a single batch.
+        """
+        if steps == 0:
+            return
+        command = "-10x" if steps > 0 else "+10x"
+        await self._type_text(command * abs(steps))
+        self.rotation += steps
 
     async def _type_text(self, text: str):
-        interval = 0.05
-        for char in text:
-            self.keyboard.press(char)
-            self.keyboard.release(char)
-            await asyncio.sleep(interval)
+        await type_batch(text, self.pacing, self.keyboard)
 
     async def device_actions(
         self,
@@ -0,0 +1,113 @@
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy
+from cv2.typing import MatLike
+
+
+@dataclass
+class FrameFingerprint:
+    """Mean gray value per tile of a grabbed frame, cheap to compare."""
+
+    # (x1, y1, x2, y2) of the frame on the screen
+    bbox: tuple[int, int, int, int]
+    tiles: numpy.ndarray
+    tile_size: int
+
+    @staticmethod
+    def of(
+        gray_image: MatLike, bbox: tuple[int, int, int, int], tile_size: int = 8
+    ) -> "FrameFingerprint":
+        height = max(1, gray_image.shape[0] // tile_size)
+        width = max(1, gray_image.shape[1] // tile_size)
+        tiles = cv2.resize(
+            gray_image[: height * tile_size, : width * tile_size],
+            (width, height),
+            interpolation=cv2.INTER_AREA,
+        )
+        return FrameFingerprint(
+            bbox=bbox, tiles=tiles.astype(numpy.int16), tile_size=tile_size
+        )
+
+    def region(self, rect: tuple[int, int, int, int]) -> numpy.ndarray:
+        """
+        Returns the tiles covering the given (x1, y1, x2, y2) pixel rectangle of the frame.
+        """
+        x1 = rect[0] // self.tile_size
+        y1 = rect[1] // self.tile_size
+        x2 = -(-rect[2] // self.tile_size)
+        y2 = -(-rect[3] // self.tile_size)
+        return self.tiles[y1:y2, x1:x2]
+
+
+@dataclass
+class MatchSkipStats:
+    skipped: int
+    executed: int
+
+    def __str__(self) -> str:
+        return f"{self.skipped} matches skipped, {self.executed} executed"
+
+
+class UnchangedMissCache:
+    """
+    Remembers where a template was not found. While the searched part of the screen stays unchanged, the template cannot be found there either.
+    Misses are kept per searched rectangle, e.g. a region hint and the whole window.
+    Safe to use from the worker threads of App.
+    """
+
+    @dataclass
+    class _Miss:
+        bbox: tuple[int, int, int, int]
+        tiles: numpy.ndarray
+
+    def __init__(self, tolerance: int = 2):
+        # max difference of a tile's mean gray value that still counts as unchanged
+        self.tolerance = tolerance
+        self._misses: dict[
+            tuple[Path, float, tuple[int, int, int, int]], UnchangedMissCache._Miss
+        ] = {}
+        self.skipped = 0
+        self.executed = 0
+        self._lock = threading.Lock()
+
+    def is_unchanged_miss(
+        self,
+        key: tuple[Path, float],
+        fingerprint: FrameFingerprint,
+        rect: tuple[int, int, int, int],
+    ) -> bool:
+        with self._lock:
+            miss = self._misses.get((*key, rect))
+            if miss is None or miss.bbox != fingerprint.bbox:
+                return False
+            tiles = fingerprint.region(rect)
+            if tiles.shape != miss.tiles.shape:
+                return False
+            if numpy.abs(tiles - miss.tiles).max(initial=0) > self.tolerance:
+                return False
+            self.skipped += 1
+            return True
+
+    def record(
+        self,
+        key: tuple[Path, float],
+        fingerprint: FrameFingerprint,
+        rect: tuple[int, int, int, int],
+        found: bool,
+    ) -> None:
+        with self._lock:
+            self.executed += 1
+            if found:
+                self._misses.pop((*key, rect), None)
+            else:
+                self._misses[(*key, rect)] = self._Miss(
+                    bbox=fingerprint.bbox,
+                    tiles=fingerprint.region(rect).copy(),
+                )
+
+    def stats(self) -> MatchSkipStats:
+        with self._lock:
+            return MatchSkipStats(skipped=self.skipped, executed=self.executed)
@@ -0,0 +1,89 @@
+from abc import ABC, abstractmethod
+from collections import Counter
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import PIL.Image
+import PIL.ImageGrab
+
+if TYPE_CHECKING:
+    import pywinctl
+
+
+class FrameSource(ABC):
+    """
+    Provides the frames that App matches templates against.
+    """
+
+    @abstractmethod
+    def get_bounding_box(self) -> tuple[int, int, int, int]:
+        """
+        Returns the (x1, y1, x2, y2) of the app window on the screen.
+        """
+
+    @abstractmethod
+    def grab(self, bbox: tuple[int, int, int, int]) -> PIL.Image.Image:
+        """
+        Returns the given part of the screen as an RGB image.
+        """
+
+
+class LiveFrameSource(FrameSource):
+    """Grabs frames of an app window from the screen."""
+
+    def __init__(self, window: "pywinctl.Window"):
+        self.window = window
+
+    def get_bounding_box(self) -> tuple[int, int, int, int]:
+        client_frame = self.window.getClientFrame()
+        return (
+            client_frame.left,
+            client_frame.top,
+            client_frame.right,
+            client_frame.bottom,
+        )
+
+    def grab(self, bbox: tuple[int, int, int, int]) -> PIL.Image.Image:
+        # grabbing window only does not work on all windows, see https://github.com/python-pillow/Pillow/pull/8516#issuecomment-3794640267
+        return PIL.ImageGrab.grab(bbox=bbox)
+
+
+class ReplayFrameSource(FrameSource):
+    """
+    Serves recorded frames, e.g. the `image_grab` dumps of App.debug_dir. Each grab returns the current frame and advances to the next one; the last frame is repeated.
+    """
+
+    def __init__(self, directory: Path, loop: bool = False):
+        paths = sorted(directory.glob("*.png"))
+        assert len(paths) > 0, f"No frames found in {directory}"
+        # region grabs are dumped as well, only the full window frames are replayed
+        sizes = {}
+        for path in paths:
+            with PIL.Image.open(path) as image:
+                sizes[path] = image.size
+        window_size, _ = Counter(sizes.values()).most_common(1)[0]
+        self.paths = [path for path in paths if sizes[path] == window_size]
+        self.window_size = window_size
+        self.loop = loop
+        self.index = 0
+
+    def get_bounding_box(self) -> tuple[int, int, int, int]:
+        return (0, 0, self.window_size[0], self.window_size[1])
+
+    def grab(self, bbox: tuple[int, int, int, int]) -> PIL.Image.Image:
+        with PIL.Image.open(self.paths[self.index]) as image:
+            frame = image.convert("RGB").crop(bbox)
+        self.advance()
+        return frame
+
+    def advance(self) -> None:
+        if self.index + 1 < len(self.paths):
+            self.index += 1
+        elif self.loop:
+            self.index = 0
+
+    def rewind(self) -> None:
+        self.index = 0
+
+    def __len__(self) -> int:
+        return len(self.paths)
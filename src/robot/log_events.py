@@ -0,0 +1,106 @@
+import re
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+
+@dataclass
+class LogEvent:
+    # position in the stream of parsed events
+    sequence: int
+    time: datetime
+    line: str
+
+
+@dataclass
+class EmulatorConnected(LogEvent):
+    device_name: str
+
+
+@dataclass
+class EmulatorDisconnected(LogEvent):
+    pass
+
+
+@dataclass
+class LogException(LogEvent):
+    exception_type: str
+    message: str
+
+
+class LogParser:
+    """
+    Turns Player.log lines into typed events. Lines without a known pattern are ignored.
+    """
+
+    def __init__(self):
+        self._patterns: list[tuple[re.Pattern, Callable[..., LogEvent]]] = [
+            (re.compile(r"Emulator: connect (?P<device_name>\S+)"), EmulatorConnected),
+            (re.compile(r"Emulator: disconnect"), EmulatorDisconnected),
+            # Unity logs uncaught exceptions as `Type: message` followed by the stack trace
+            (
+                re.compile(r"^(?P<exception_type>[\w.]*Exception): (?P<message>.*)$"),
+                LogException,
+            ),
+        ]
+        self._sequence = 0
+
+    def parse(self, line: str, time: datetime | None = None) -> LogEvent | None:
+        for pattern, event_type in self._patterns:
+            match = pattern.search(line)
+            if match is None:
+                continue
+            self._sequence += 1
+            return event_type(
+                sequence=self._sequence,
+                time=time if time is not None else datetime.now(),
+                line=line,
+                **match.groupdict(),
+            )
+        return None
+
+
+class LogEventIndex:
+    """
+    Recent events per event type, in the order they were logged.
+    """
+
+    def __init__(self, max_events_per_type: int | None = 1000):
+        self.max_events_per_type = max_events_per_type
+        self._events: dict[type[LogEvent], deque[LogEvent]] = {}
+        self.last_sequence = 0
+
+    def add(self, event: LogEvent) -> None:
+        events = self._events.setdefault(
+            type(event), deque(maxlen=self.max_events_per_type)
+        )
+        events.append(event)
+        self.last_sequence = event.sequence
+
+    def of_type(self, event_type: type[LogEvent], after: int = 0) -> list[LogEvent]:
+        """
+        Returns the events of the given type with a sequence number greater than `after`, oldest first.
+        """
+        events = self._events.get(event_type, deque())
+        return [event for event in events if event.sequence > after]
+
+    def last(self, event_type: type[LogEvent]) -> LogEvent | None:
+        events = self._events.get(event_type)
+        return events[-1] if events else None
+
+
+def parse_file(path: Path, parser: LogParser | None = None) -> LogEventIndex:
+    """
+    Parses a recorded Player.log. The events are timestamped with the modification time of the file, the log itself has no timestamps.
+    """
+    parser = parser if parser is not None else LogParser()
+    index = LogEventIndex(max_events_per_type=None)
+    time = datetime.fromtimestamp(path.stat().st_mtime)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            event = parser.parse(line.rstrip("\r\n"), time)
+            if event is not None:
+                index.add(event)
+    return index
@@ -4,6 +4,7 @@ import os
 from robot.app import App
 from robot.config import get_small_image_dir, password, username
 from robot.device_emulator import DeviceEmulator
+from robot.page_classifier import PageClassifier
 from robot.pages import Pages, PageTags
 from robot.state_machine import UIStateMachine
 from robot.states import Games, UIState
@@ -25,6 +26,7 @@ class Navigation:
         self.device_emulator = device_emulator
         self.state_machine = state_machine
         self.pending_game: Games | None = None
+        self.page_classifier = PageClassifier(app, self.img_dir)
         state_machine.register_transition_actions(self.page_actions)
 
     async def locate(
@@ -56,50 +58,42 @@ class Navigation:
             timeout,
             f"Current page not detected within {timeout} seconds",
         )
-        detected_page = None
         while True:
-            with self.app.cached_screenshot():
-                if await self.locate("startup/assert_intro.png", 0.95):
-                    detected_page = Pages.startup
-                elif await self.locate("startup/assert_update_now.png", 0.95):
-                    detected_page = Pages.update
-                elif await self.locate("home/assert_stats_label.png"):
-                    detected_page = Pages.home
-                elif await self.locate("login/assert_login_title.png"):
-                    detected_page = Pages.login
-                elif await self.locate("settings/assert_title.png"):
-                    detected_page = Pages.settings
-                elif await self.locate("introduction/assert_welcome_title.png"):
-                    detected_page = Pages.introduction
-                elif await self.locate("home/assert_please_connect_label.png"):
-                    detected_page = Pages.please_connect
-                elif await self.locate("position_selection/assert_title.png"):
-                    detected_page = Pages.position_selection
-                elif await self.locate("game_center/assert_title.png"):
-                    detected_page = Pages.game_center
-                elif await self.locate("movement_selection/assert_title.png"):
-                    detected_page = Pages.movement_selection
-                elif await self.locate("calibrate/assert_title.png"):
-                    detected_page = Pages.calibrate
-                elif await self.locate("game/assert_pause_title.png"):
-                    detected_page = Pages.pause_menu
-                elif await self.locate("sphere_runner/assert_score.png"):
-                    detected_page = Pages.gameplay
-                elif await self.locate("game/assert_feedback_title.png"):
-                    detected_page = Pages.feedback
+            detected_page = await timer.wait_for(
+                self.page_classifier.classify(self.state_machine.likely_pages())
+            )
             if detected_page is not None:
                 if os.environ.get("DEBUG"):
                     print(f"Detected page: {detected_page}")
-                self.state_machine.update_page(detected_page)
-                if detected_page.has(PageTags.game) and self.pending_game is not None:
-                    self.state_machine.udpate_game(self.pending_game)
-                    self.pending_game = None
-                if not detected_page.has(PageTags.game):
-                    self.state_machine.udpate_game(Games.no_game)
+                self._update_page(detected_page)
                 return detected_page
             timer.check()
             await asyncio.sleep(0.2)
 
+    def _update_page(self, page: Pages):
+        self.state_machine.update_page(page)
+        if page.has(PageTags.game) and self.pending_game is not None:
+            self.state_machine.udpate_game(self.pending_game)
+            self.pending_game = None
+        if not page.has(PageTags.game):
+            self.state_machine.udpate_game(Games.no_game)
+
+    async def _wait_for_transition(self, transition: DefinedTransition):
+        """
+        Waits until the page shown changes. Only the templates of the expected and the old page are checked, a full classification runs when neither is shown.
+        """
+        expected_page = transition.new.page
+        old_page = transition.old.page
+        while self.state_machine.state.page == old_page:
+            if await self.page_classifier.confirm(expected_page):
+                if os.environ.get("DEBUG"):
+                    print(f"Confirmed page: {expected_page}")
+                self._update_page(expected_page)
+            elif await self.page_classifier.confirm(old_page):
+                await asyncio.sleep(0.2)
+            else:
+                await self.detect_current_page()
+
     async def wait_for_page(self, page: Pages, timeout: float = 5):
         timer = Timeout(
             timeout,
@@ -116,18 +110,27 @@ class Navigation:
             await asyncio.sleep(0.5)
 
     async def go_to_page(self, target: Pages) -> None:
+        """
+        Follows the planned route to the target page. The route is planned again only when a transition ends in an unexpected state.
+        """
         await self.detect_current_page()
-        current_page = self.state_machine.state.page
         visited_states = [self.state_machine.state]
-        while current_page != target:
-            new = await self.state_machine.go_towards(UIState(target))
+        route: list[DefinedTransition] = []
+        while self.state_machine.state.page != target:
+            if len(route) == 0:
+                route = self.state_machine.plan_route(UIState(target))
+            transition = route.pop(0)
+            if os.environ.get("DEBUG"):
+                print(f"Trigger {transition.old} → {transition.new}")
+            new = await self.state_machine.fire_transition(transition)
             loop_detected = new in visited_states
             visited_states.append(new)
             if loop_detected:
                 raise ValueError(
                     f"Transition loop detected:\n{"\n".join([f"* {str(state)}" if state == new else f"  {str(state)}" for state in visited_states])}"
                 )
-            current_page = new.page
+            if new != transition.new:
+                route = []
 
     async def trigger_transition(self, target: Pages) -> None:
         """Trigger transition to other page without waiting for it to complete."""
@@ -204,7 +207,5 @@ class Navigation:
             timeout,
             f"Failed to fire {transition} within {timeout} seconds",
         )
-        while self.state_machine.state.page == transition.old.page:
-            timer.check()
-            await self.detect_current_page()
+        await timer.wait_for(self._wait_for_transition(transition))
         return True
@@ -0,0 +1,145 @@
+import asyncio
+from dataclasses import dataclass
+from pathlib import Path
+
+from robot.app import App
+from robot.pages import Pages
+from robot.paths import get_small_image_dir
+from robot.region_hints import region_hints
+from robot.template_store import template_store
+
+
+@dataclass
+class PageTemplate:
+    """Template that identifies a page when found on the screen."""
+
+    page: Pages
+    image: str
+    confidence: float = 0.9
+    # pages drawn on top of this page, e.g. menus; a match of their templates wins over this page
+    shadowed_by: tuple[Pages, ...] = ()
+
+
+# default order is used for pages without priority
+_page_templates = [
+    PageTemplate(Pages.startup, "startup/assert_intro.png", 0.95),
+    PageTemplate(Pages.update, "startup/assert_update_now.png", 0.95),
+    PageTemplate(Pages.home, "home/assert_stats_label.png"),
+    PageTemplate(Pages.login, "login/assert_login_title.png"),
+    PageTemplate(Pages.settings, "settings/assert_title.png"),
+    PageTemplate(Pages.introduction, "introduction/assert_welcome_title.png"),
+    PageTemplate(Pages.please_connect, "home/assert_please_connect_label.png"),
+    PageTemplate(Pages.position_selection, "position_selection/assert_title.png"),
+    PageTemplate(Pages.game_center, "game_center/assert_title.png"),
+    PageTemplate(Pages.movement_selection, "movement_selection/assert_title.png"),
+    PageTemplate(Pages.calibrate, "calibrate/assert_title.png"),
+    PageTemplate(Pages.pause_menu, "game/assert_pause_title.png"),
+    PageTemplate(
+        Pages.gameplay,
+        "sphere_runner/assert_score.png",
+        shadowed_by=(Pages.pause_menu,),
+    ),
+    PageTemplate(Pages.feedback, "game/assert_feedback_title.png"),
+]
+
+
+class PageClassifier:
+    """
+    Detects the current page from a single screen grab. Templates of likely pages are checked first and the first confident match wins.
+    Templates are matched in parallel on the app's worker pool, one batch of worker_count templates at a time.
+    """
+
+    def __init__(self, app: App, img_dir: Path | None = None):
+        self.app = app
+        self.img_dir = img_dir if img_dir is not None else get_small_image_dir()
+        self.templates = {template.page: template for template in _page_templates}
+
+    def ordered_templates(self, priority: list[Pages]) -> list[PageTemplate]:
+        """
+        Returns the page templates, starting with the given pages in the given order.
+        """
+        ordered = [self.templates[page] for page in priority if page in self.templates]
+        ordered += [t for t in _page_templates if t not in ordered]
+        return ordered
+
+    async def classify(self, priority: list[Pages] | None = None) -> Pages | None:
+        """
+        Grabs the app window once and returns the first page whose template is found, or None if no page matches.
+        Pages that can be drawn over each other declare it with `shadowed_by`, the page on top wins.
+        """
+        large_image, _ = await self.app.grab()
+        results: dict[Pages, bool] = {}
+
+        async def is_shown(template: PageTemplate) -> bool:
+            if template.page not in results:
+                results[template.page] = await self._match(template, large_image)
+            return results[template.page]
+
+        ordered = self.ordered_templates(priority or [])
+        batch_size = self.app.worker_count
+        for start in range(0, len(ordered), batch_size):
+            batch = ordered[start : start + batch_size]
+            await asyncio.gather(*(is_shown(template) for template in batch))
+            for template in batch:
+                if not results[template.page]:
+                    continue
+                for page in template.shadowed_by:
+                    if await is_shown(self.templates[page]):
+                        return page
+                return template.page
+        return None
+
+    async def confirm(self, page: Pages) -> bool:
+        """
+        Grabs the app window and checks only the template of the given page, e.g. to confirm the expected page after a transition.
+        Returns False if the page has no template or is shadowed by another page.
+        """
+        if page not in self.templates:
+            return False
+        large_image, _ = await self.app.grab()
+        template = self.templates[page]
+        if not await self._match(template, large_image):
+            return False
+        for shadowing_page in template.shadowed_by:
+            if await self._match(self.templates[shadowing_page], large_image):
+                return False
+        return True
+
+    async def _match(self, template: PageTemplate, large_image: App.ImageCache) -> bool:
+        image_path = self.img_dir / template.image
+        # try the declared or learned region first, fall back to the whole frame
+        hint = region_hints.get(image_path)
+        if hint is not None and await self._match_in_region(
+            template, large_image, hint
+        ):
+            if self.app.needs_hint_check(image_path, template.confidence):
+                # raises if the template occurs elsewhere as well, like App.locate
+                await self._match_in_region(template, large_image, (0, 0, 1.0, 1.0))
+            return True
+        return await self._match_in_region(template, large_image, (0, 0, 1.0, 1.0))
+
+    async def _match_in_region(
+        self,
+        template: PageTemplate,
+        large_image: App.ImageCache,
+        region: tuple[float, float, float, float],
+    ) -> bool:
+        image_path = self.img_dir / template.image
+        image, _ = App.crop(large_image, region)
+        small_shape = template_store.get(image_path).shape
+        if image.gray_image.shape[0] < small_shape[0]:
+            return False
+        if image.gray_image.shape[1] < small_shape[1]:
+            return False
+        match = await self.app.run_in_worker(
+            self.app.match, large_image, image_path, template.confidence, region
+        )
+        if match is None:
+            return False
+        bbox = match.bbox
+        height, width = large_image.gray_image.shape[:2]
+        region_hints.observe(
+            image_path,
+            (bbox[0] / width, bbox[1] / height, bbox[2] / width, bbox[3] / height),
+        )
+        return True
@@ -24,7 +24,7 @@ class Pages(Enum):
     _restart = "_restart"
 
     def has(self, tag: "PageTags") -> bool:
-        return tag in _page_tags[self]
+        return _page_tag_masks[self] & _page_tag_bits[tag] != 0
 
 
 class PageTags(Enum):
@@ -58,3 +58,10 @@ _page_tags = {
 
 for page in Pages:
     assert page in _page_tags, f"Page {page} is missing tags"
+
+# tags as bitmasks, checking a tag is a single bit operation
+_page_tag_bits = {tag: 1 << i for i, tag in enumerate(PageTags)}
+_page_tag_masks = {
+    page: sum(_page_tag_bits[tag] for tag in set(tags))
+    for page, tags in _page_tags.items()
+}
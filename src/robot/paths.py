@@ -0,0 +1,23 @@
+from pathlib import Path
+
+# free of side effects on import, unlike robot.config which loads the .env file
+
+
+def get_builds_download_dir() -> Path:
+    return Path.home() / "Documents" / "visual_testing"
+
+
+def get_data_dir(test_id: str) -> Path:
+    return get_builds_download_dir() / test_id
+
+
+def get_cache_dir() -> Path:
+    return get_builds_download_dir() / "cache"
+
+
+def get_screenshot_dir(test_id: str) -> Path:
+    return get_data_dir(test_id) / "screenshots"
+
+
+def get_small_image_dir() -> Path:
+    return Path(__file__).parent / "tests" / "images"
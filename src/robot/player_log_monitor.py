@@ -1,44 +1,191 @@
 import asyncio
+import re
+from collections import deque
 from pathlib import Path
 
-from robot.timeout import Timeout
+from robot.log_events import LogEventIndex, LogParser
+from robot.tracing import tracer
 
 
 class PlayerLogMonitor:
+    """
+    Follows the Player.log of the app in the background. Lines written after an expectation is registered resolve it immediately.
+    The file is followed across truncation and rotation, e.g. when the app restarts. Known lines are parsed into typed events, see `events`.
+    """
+
+    class _Expectation:
+        def __init__(self, pattern: str | re.Pattern):
+            self.pattern = pattern
+            self.event = asyncio.Event()
+            self.line: str | None = None
+
+        def matches(self, line: str) -> bool:
+            if isinstance(self.pattern, re.Pattern):
+                return self.pattern.search(line) is not None
+            return self.pattern in line
+
     class _AssertNewLogEntry:
         def __init__(
-            self, log_file_path: Path, expected_entry: str, timeout: float | None = None
+            self,
+            monitor: "PlayerLogMonitor",
+            expected_entry: str | re.Pattern,
+            timeout: float | None = None,
         ):
-            self.log_file_path = log_file_path
-            self.last_position = 0
+            self.monitor = monitor
             self.expected_entry = expected_entry
             self.timeout = timeout if timeout is not None else 1.0
+            self.expectation: PlayerLogMonitor._Expectation | None = None
 
         async def __aenter__(self):
-            # move to the end of the file
-            with open(self.log_file_path, "r", encoding="utf-8") as f:
-                f.seek(0, 2)
-                self.last_position = f.tell()
+            # only lines written from now on count
+            self.expectation = self.monitor.expect(self.expected_entry)
 
         async def __aexit__(self, exc_type, exc_val, exc_tb):
-            timer = Timeout(
-                self.timeout,
-                f"Expected log entry '{self.expected_entry}' not found within {self.timeout} seconds",
-            )
-            with open(self.log_file_path, "r", encoding="utf-8") as f:
-                f.seek(self.last_position)
-                new_content = f.read()
-                if self.expected_entry in new_content:
-                    return
-                timer.check()
-                await asyncio.sleep(0.5)
-
-    def __init__(self):
+            assert self.expectation is not None
+            if exc_type is not None:
+                self.monitor.discard(self.expectation)
+                return
+            with tracer.span(f"wait for log {self.expected_entry}", "log"):
+                try:
+                    await self.monitor.wait(self.expectation, self.timeout)
+                except TimeoutError:
+                    recent_lines = "\n".join(list(self.monitor.recent_lines)[-10:])
+                    raise TimeoutError(
+                        f"Expected log entry '{self.expected_entry}' not found within {self.timeout} seconds, recent lines:\n{recent_lines}"
+                    )
+
+    def __init__(
+        self,
+        log_file_path: Path | None = None,
+        poll_interval: float = 0.05,
+        history: int = 1000,
+    ):
         self.log_file_path = (
-            Path.home() / "AppData/LocalLow/Cynteract/Cynteract/Player.log"
+            log_file_path
+            if log_file_path is not None
+            else Path.home() / "AppData/LocalLow/Cynteract/Cynteract/Player.log"
         )
+        self.poll_interval = poll_interval
+        # recent lines for diagnostics
+        self.recent_lines: deque[str] = deque(maxlen=history)
+        self.parser = LogParser()
+        self.events = LogEventIndex()
+        self._expectations: list[PlayerLogMonitor._Expectation] = []
+        self._task: asyncio.Task | None = None
+        self._file_id: int | None = None
+        self._position = 0
+        self._partial_line = b""
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def start(self):
+        """
+        Starts following the log from its current end.
+        """
+        if self._task is not None:
+            return
+        self._skip_to_end()
+        self._task = asyncio.create_task(self._follow())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def expect(self, pattern: str | re.Pattern) -> _Expectation:
+        """
+        Registers an expectation for a line written from now on, either containing the given string or matching the given regex.
+        """
+        self.start()
+        # lines written before the registration must not resolve it
+        self._read_new_lines()
+        expectation = self._Expectation(pattern)
+        self._expectations.append(expectation)
+        return expectation
+
+    def discard(self, expectation: _Expectation) -> None:
+        if expectation in self._expectations:
+            self._expectations.remove(expectation)
+
+    async def wait(self, expectation: _Expectation, timeout: float) -> str:
+        """
+        Returns the line resolving the expectation, raises TimeoutError if it is not written within the timeout.
+        """
+        try:
+            await asyncio.wait_for(expectation.event.wait(), timeout)
+        finally:
+            self.discard(expectation)
+        assert expectation.line is not None
+        return expectation.line
+
+    async def wait_for_line(
+        self, pattern: str | re.Pattern, timeout: float = 1.0
+    ) -> str:
+        return await self.wait(self.expect(pattern), timeout)
 
     def assert_line(
-        self, expected_entry: str, timeout: float | None = None
+        self, expected_entry: str | re.Pattern, timeout: float | None = None
     ) -> _AssertNewLogEntry:
-        return self._AssertNewLogEntry(self.log_file_path, expected_entry, timeout)
+        return self._AssertNewLogEntry(self, expected_entry, timeout)
+
+    async def _follow(self):
+        while True:
+            self._read_new_lines()
+            await asyncio.sleep(self.poll_interval)
+
+    def _skip_to_end(self):
+        try:
+            stat = self.log_file_path.stat()
+        except FileNotFoundError:
+            self._file_id = None
+            self._position = 0
+            return
+        self._file_id = stat.st_ino
+        self._position = stat.st_size
+        self._partial_line = b""
+
+    def _read_new_lines(self):
+        try:
+            stat = self.log_file_path.stat()
+        except FileNotFoundError:
+            # the app recreates the log on start
+            self._file_id = None
+            self._position = 0
+            return
+        if stat.st_ino != self._file_id or stat.st_size < self._position:
+            # rotated or truncated, the new file is read from the start
+            self._file_id = stat.st_ino
+            self._position = 0
+            self._partial_line = b""
+        if stat.st_size == self._position:
+            return
+        with open(self.log_file_path, "rb") as f:
+            f.seek(self._position)
+            data = f.read()
+            self._position = f.tell()
+        lines = (self._partial_line + data).split(b"\n")
+        # the last line is incomplete until its newline is written
+        self._partial_line = lines.pop()
+        for line in lines:
+            self._on_line(line.decode("utf-8", errors="replace").rstrip("\r"))
+
+    def _on_line(self, line: str):
+        self.recent_lines.append(line)
+        event = self.parser.parse(line)
+        if event is not None:
+            self.events.add(event)
+        for expectation in list(self._expectations):
+            if expectation.matches(line):
+                expectation.line = line
+                expectation.event.set()
+                self._expectations.remove(expectation)
@@ -0,0 +1,113 @@
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+Region = tuple[float, float, float, float]
+
+
+@dataclass
+class RegionHint:
+    # search rectangle relative to the window, (x1, y1, x2, y2) in [0, 1]
+    region: Region
+    # declared hints are maintained by hand and never overwritten by learning
+    declared: bool = False
+
+
+class RegionHints:
+    """
+    Search rectangles for templates, stored in a `regions.json` manifest next to the template images.
+    """
+
+    manifest_name = "regions.json"
+
+    def __init__(self, padding: float = 0.05):
+        self.padding = padding
+        self.learning = os.environ.get("LEARN_REGIONS") is not None
+        self._manifests: dict[Path, tuple[int, dict[str, RegionHint]]] = {}
+        self._observed: dict[Path, Region] = {}
+
+    def get(self, image_path: Path) -> Region | None:
+        """
+        Returns the padded search region for the given template, or None if there is no hint.
+        """
+        hint = self._load(image_path.parent).get(image_path.name)
+        if hint is None:
+            return None
+        x1, y1, x2, y2 = hint.region
+        return (
+            max(0.0, x1 - self.padding),
+            max(0.0, y1 - self.padding),
+            min(1.0, x2 + self.padding),
+            min(1.0, y2 + self.padding),
+        )
+
+    def observe(self, image_path: Path, region: Region) -> None:
+        """
+        Records where a template was found. Observations are written to the manifests by save() if learning is enabled.
+        """
+        if not self.learning:
+            return
+        observed = self._observed.get(image_path)
+        if observed is not None:
+            region = (
+                min(observed[0], region[0]),
+                min(observed[1], region[1]),
+                max(observed[2], region[2]),
+                max(observed[3], region[3]),
+            )
+        self._observed[image_path] = region
+
+    def save(self) -> None:
+        """
+        Writes the observed regions back to the manifests, keeping declared hints.
+        """
+        by_directory: dict[Path, list[Path]] = {}
+        for image_path in self._observed:
+            by_directory.setdefault(image_path.parent, []).append(image_path)
+        for directory, image_paths in by_directory.items():
+            hints = dict(self._load(directory))
+            for image_path in image_paths:
+                existing = hints.get(image_path.name)
+                if existing is not None and existing.declared:
+                    continue
+                x1, y1, x2, y2 = self._observed[image_path]
+                hints[image_path.name] = RegionHint(
+                    region=(round(x1, 4), round(y1, 4), round(x2, 4), round(y2, 4))
+                )
+            manifest_path = directory / self.manifest_name
+            logging.info(
+                f"Save {len(image_paths)} learned regions to {manifest_path} ."
+            )
+            content = {
+                name: {"region": list(hint.region), "declared": hint.declared}
+                for name, hint in sorted(hints.items())
+            }
+            tmp_path = manifest_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(content, indent=2) + "\n")
+            tmp_path.replace(manifest_path)
+            self._manifests.pop(directory, None)
+        self._observed.clear()
+
+    def _load(self, directory: Path) -> dict[str, RegionHint]:
+        manifest_path = directory / self.manifest_name
+        try:
+            mtime_ns = manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        cached = self._manifests.get(directory)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        content = json.loads(manifest_path.read_text())
+        hints: dict[str, RegionHint] = {}
+        for name, entry in content.items():
+            x1, y1, x2, y2 = entry["region"]
+            hints[name] = RegionHint(
+                region=(x1, y1, x2, y2), declared=entry.get("declared", False)
+            )
+        self._manifests[directory] = (mtime_ns, hints)
+        return hints
+
+
+region_hints = RegionHints()
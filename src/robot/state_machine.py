@@ -1,20 +1,30 @@
 import os
+import time
 from collections.abc import Awaitable, Callable
 
 from robot.device_types import DeviceTypes
 from robot.pages import Pages
 from robot.states import DefinedUIState, Games, UIState
+from robot.tracing import tracer
+from robot.transition_stats import TransitionStatsStore, transition_stats
 from robot.transitions import DefinedTransition, Transitions
 
 
 class UIStateMachine:
-    def __init__(self, initial_state: DefinedUIState):
+    def __init__(
+        self,
+        initial_state: DefinedUIState,
+        stats: TransitionStatsStore = transition_stats,
+    ):
         self.state = initial_state
         self.in_transition = False
         self.transition_actions: list[
             Callable[[DefinedTransition, bool, float | None], Awaitable[bool]]
         ] = []
-        self.transitions = Transitions()
+        self.stats = stats
+        self.transitions = Transitions(
+            stats.costs() if stats.use_measured_costs else None
+        )
 
     def register_transition_actions(
         self,
@@ -30,17 +40,32 @@ class UIStateMachine:
     ) -> DefinedUIState:
         transition_handled = False
         self.in_transition = True
-        for action in self.transition_actions:
-            if await action(transition, wait_for_transition, timeout):
-                transition_handled = True
-                break
-        if not transition_handled:
-            raise ValueError(f"No action defined for the transition: {transition}")
-        # the new state is not necessarily the same as transition.new:
-        # - action might have failed
-        # - state might have changed differently than expected
-        self.in_transition = False
-        return self.state
+        with tracer.span(f"{transition.old} → {transition.new}", "transition"):
+            start_time = time.perf_counter()
+            try:
+                for action in self.transition_actions:
+                    if await action(transition, wait_for_transition, timeout):
+                        transition_handled = True
+                        break
+            except Exception:
+                if wait_for_transition:
+                    self.stats.record(
+                        transition, time.perf_counter() - start_time, failed=True
+                    )
+                raise
+            if not transition_handled:
+                raise ValueError(f"No action defined for the transition: {transition}")
+            # the new state is not necessarily the same as transition.new:
+            # - action might have failed
+            # - state might have changed differently than expected
+            self.in_transition = False
+            if wait_for_transition:
+                self.stats.record(
+                    transition,
+                    time.perf_counter() - start_time,
+                    failed=self.state != transition.new,
+                )
+            return self.state
 
     async def go_towards(self, new: UIState) -> DefinedUIState:
         transition = self.transitions.get_next_transition(self.state, new)
@@ -61,6 +86,22 @@ class UIStateMachine:
             print(message)
         await self.fire_transition(transition, wait_for_transition=False)
 
+    def plan_route(self, new: UIState) -> list[DefinedTransition]:
+        """
+        Returns all transitions from the current state to the new state.
+        """
+        return self.transitions.get_route(self.state, new)
+
+    def likely_pages(self) -> list[Pages]:
+        """
+        Returns the current page followed by the pages reachable with a single transition, cheapest first.
+        """
+        pages = [self.state.page]
+        for neighbour in self.transitions.get_neighbours(self.state):
+            if neighbour.page not in pages:
+                pages.append(neighbour.page)
+        return pages
+
     def check_state(self):
         if not self.in_transition and not DefinedUIState.is_valid(self.state):
             raise ValueError(f"Invalid state: {self.state}")
@@ -1,7 +1,8 @@
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
 
-from robot.device_emulator import DeviceTypes
+from robot.device_types import DeviceTypes
 from robot.pages import Pages, PageTags
 
 
@@ -62,6 +63,8 @@ class UIState:
 
 
 _valid_states: list["DefinedUIState"] = []
+# interned states, the id is the index in _valid_states
+_valid_state_ids: dict["DefinedUIState", int] = {}
 
 
 @dataclass(frozen=True)
@@ -83,7 +86,13 @@ class DefinedUIState:
 
     @staticmethod
     def is_valid(state: "DefinedUIState") -> bool:
-        return state in _valid_states
+        return state in _valid_state_ids
+
+    def id(self) -> int:
+        """
+        Returns the compact id of a valid state.
+        """
+        return _valid_state_ids[self]
 
     @staticmethod
     def is_valid_uncached(state: "DefinedUIState") -> bool:
@@ -117,63 +126,32 @@ for page in Pages:
         for device in DeviceTypes:
             state = DefinedUIState(page=page, game=game, device=device)
             if DefinedUIState.is_valid_uncached(state):
+                _valid_state_ids[state] = len(_valid_states)
                 _valid_states.append(state)
 
 
 def expand_states(states: list[UIState]) -> list[DefinedUIState]:
-    # expand page
-    new_states: list[UIState] = []
-    for state in states:
-        if isinstance(state.page, Pages):
-            new_states.append(state)
-        elif isinstance(state.page, PageTags):
-            for page in Pages:
-                if page.has(state.page):
-                    new_states.append(state.with_(page=page))
-        else:
-            for page in Pages:
-                new_states.append(state.with_(page=page))
-    states = new_states
-
-    # expand game
-    new_states = []
-    for state in states:
-        if state.game is not None:
-            new_states.append(state)
-        else:
-            for game in Games:
-                new_states.append(state.with_(game=game))
-    states = new_states
-
-    # expand device
-    new_states = []
-    for state in states:
-        if state.device is not None:
-            new_states.append(state)
-        else:
-            for device_type in DeviceTypes:
-                new_states.append(state.with_(device=device_type))
-    states = new_states
-
-    # convert type
-    new_defined_states: list[DefinedUIState] = []
+    result: list[DefinedUIState] = []
     for state in states:
-        assert (
-            isinstance(state.page, Pages)
-            and isinstance(state.game, Games)
-            and isinstance(state.device, DeviceTypes)
-        )
-        new_defined_states.append(
-            DefinedUIState(
-                page=state.page,
-                game=state.game,
-                device=state.device,
-            )
-        )
-
-    # filter invalid states
-    new_defined_states = [
-        state for state in new_defined_states if DefinedUIState.is_valid(state)
-    ]
-
-    return new_defined_states
+        result.extend(expand_state(state))
+    return result
+
+
+def expand_state(state: UIState) -> tuple[DefinedUIState, ...]:
+    """
+    Returns all valid states matching the given partial state, in the order of valid_states().
+    """
+    return _expand_state(state.page, state.game, state.device)
+
+
+@lru_cache(maxsize=None)
+def _expand_state(
+    page: Pages | PageTags | None,
+    game: Games | None,
+    device: DeviceTypes | None,
+) -> tuple[DefinedUIState, ...]:
+    pattern = UIState()
+    pattern.page = page
+    pattern.game = game
+    pattern.device = device
+    return tuple(state for state in _valid_states if pattern.matches(state))
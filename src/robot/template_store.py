@@ -0,0 +1,92 @@
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+from cv2.typing import MatLike
+
+from robot.paths import get_small_image_dir
+
+
+@dataclass
+class TemplateStoreStats:
+    hits: int
+    misses: int
+    size: int
+
+    def __str__(self) -> str:
+        return f"{self.size} templates, {self.hits} hits, {self.misses} misses"
+
+
+class TemplateStore:
+    """
+    Process-wide store of decoded template images. Each template is decoded once into a grayscale array and reused until the file's mtime changes.
+    Safe to use from the worker threads of App.
+    """
+
+    @dataclass
+    class _Entry:
+        mtime_ns: int
+        gray_image: MatLike
+
+    def __init__(self):
+        self._entries: dict[Path, TemplateStore._Entry] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> MatLike:
+        """
+        Returns the grayscale image for the given path, decoding it only if it is not cached or has changed on disk.
+        """
+        mtime_ns = path.stat().st_mtime_ns
+        # decoding under the lock keeps concurrent callers from decoding the same template twice
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.mtime_ns == mtime_ns:
+                self.hits += 1
+                return entry.gray_image
+            self.misses += 1
+            entry = self._Entry(mtime_ns=mtime_ns, gray_image=self._decode(path))
+            self._entries[path] = entry
+            return entry.gray_image
+
+    def warm_up(self, directory: Path | None = None) -> None:
+        """
+        Decodes all templates below the given directory (default: the robot's image directory) ahead of time.
+        """
+        if directory is None:
+            directory = get_small_image_dir()
+        count = 0
+        for path in sorted(directory.rglob("*.png")):
+            mtime_ns = path.stat().st_mtime_ns
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is None or entry.mtime_ns != mtime_ns:
+                    self._entries[path] = self._Entry(
+                        mtime_ns=mtime_ns, gray_image=self._decode(path)
+                    )
+                    count += 1
+        logging.info(f"Preloaded {count} templates from {directory} .")
+
+    def stats(self) -> TemplateStoreStats:
+        with self._lock:
+            return TemplateStoreStats(
+                hits=self.hits, misses=self.misses, size=len(self._entries)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @staticmethod
+    def _decode(path: Path) -> MatLike:
+        image = cv2.imread(str(path))
+        assert image is not None, f"Could not load small image at {path}"
+        return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+
+template_store = TemplateStore()
@@ -13,8 +13,12 @@ from robot.device_types import DeviceTypes
 from robot.navigation import Navigation
 from robot.pages import Pages
 from robot.player_log_monitor import PlayerLogMonitor
+from robot.region_hints import region_hints
 from robot.state_machine import UIStateMachine
 from robot.states import DefinedUIState, Games
+from robot.template_store import template_store
+from robot.tracing import tracer
+from robot.transition_stats import transition_stats
 from robot.utils import keyboard
 from shared.utils import load_env_file
 
@@ -29,6 +33,7 @@ def pytest_addoption(parser):
         default=env.get("BINARY_PATH"),
         required=env.get("BINARY_PATH") is None,
     )
+    parser.addoption("--no-preload-templates", action="store_true", default=False)
 
 
 @pytest.fixture
@@ -41,6 +46,14 @@ def binary_path(pytestconfig):
     return Path(pytestconfig.getoption("binary_path"))
 
 
+@pytest.fixture(scope="session", autouse=True)
+def preload_templates(pytestconfig):
+    if not pytestconfig.getoption("no_preload_templates"):
+        template_store.warm_up()
+    yield
+    logging.info(f"Template store: {template_store.stats()}")
+
+
 @pytest_asyncio.fixture
 async def app(binary_path):
     async with App() as app:
@@ -50,11 +63,14 @@ async def app(binary_path):
         await app.resize_client_frame(*get_frame_size())
         app.enforce_size()
         yield app
+        logging.info(f"Template matching: {app.unchanged_misses.stats()}")
+        logging.info(f"Screen capture: {app.capture_scheduler.stats()}")
 
 
-@pytest.fixture
-def player_log_monitor():
-    yield PlayerLogMonitor()
+@pytest_asyncio.fixture
+async def player_log_monitor():
+    async with PlayerLogMonitor() as monitor:
+        yield monitor
 
 
 @pytest.fixture
@@ -90,6 +106,17 @@ async def navigation(
     yield nav
 
 
+def pytest_sessionfinish(session, exitstatus):
+    # learned template regions are only trusted from successful runs
+    if region_hints.learning and exitstatus == 0:
+        region_hints.save()
+    # failed transitions are part of the statistics
+    transition_stats.save()
+    if tracer.enabled:
+        test_id = session.config.getoption("test_id")
+        tracer.export(get_data_dir(test_id) / "trace.json")
+
+
 def pytest_runtest_makereport(item, call):
     # Check if the test raised an exception (failed)
     if call.excinfo is not None:
@@ -28,6 +28,8 @@ async def login_with_browser_cookie_absent(username: str, password: str, test_id
             raise ValueError(f"Unsupported screen scale: {scale}%")
         await browser.resize_client_frame(*frame_size)
         browser.enforce_size()
+        # browser frames are large, especially at 150% scale
+        browser.pyramid_matching = True
 
         # lower confidence than default for cross-browser compatibility
         confidence = 0.8
@@ -1,7 +1,14 @@
+import asyncio
 import time
+from typing import Awaitable, TypeVar
+
+T = TypeVar("T")
 
 
 class Timeout:
+    # minimum time for the last attempt in wait_for, in seconds
+    min_attempt_time: float = 1.0
+
     def __init__(self, timeout: float, error_message: str):
         self.timeout = timeout
         self.error_message = error_message
@@ -10,3 +17,22 @@ class Timeout:
     def check(self):
         if time.time() - self.start_time > self.timeout:
             raise TimeoutError(self.error_message)
+
+    def remaining(self) -> float:
+        return max(0.0, self.timeout - (time.time() - self.start_time))
+
+    async def wait_for(self, awaitable: Awaitable[T]) -> T:
+        """
+        Awaits the given awaitable, cancelling it when the timeout expires.
+        The awaitable gets at least `min_attempt_time` seconds, so a polling round started just before the timeout still checks the screen once more.
+        """
+        try:
+            async with asyncio.timeout(
+                max(self.remaining(), self.min_attempt_time)
+            ) as attempt_timeout:
+                return await awaitable
+        except TimeoutError:
+            if attempt_timeout.expired():
+                raise TimeoutError(self.error_message) from None
+            # raised by the awaitable itself, e.g. a nested timeout
+            raise
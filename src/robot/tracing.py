@@ -0,0 +1,113 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+
+class Tracer:
+    """
+    Collects timed spans and exports them in the Chrome trace event format, viewable in chrome://tracing or https://ui.perfetto.dev .
+    Each thread gets its own track, e.g. the workers of App. Spans of asyncio tasks are async events with the task as id,
+    concurrent tasks on the event loop would otherwise overlap on one track.
+    At most `max_events` events are kept until the next export, further spans are counted but dropped.
+    """
+
+    def __init__(self):
+        self.enabled = os.environ.get("NO_TRACE") is None
+        self.max_events = int(os.environ.get("TRACE_MAX_EVENTS", 1_000_000))
+        self._events: list[dict] = []
+        self._dropped = 0
+        self._tracks: dict[int, int] = {}
+        self._track_names: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str, **args) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        track = self._get_track()
+        task = self._get_task()
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            event = {
+                "name": name,
+                "cat": category,
+                "ts": start / 1000,
+                "pid": os.getpid(),
+                "tid": track,
+            }
+            if args:
+                event["args"] = {key: str(value) for key, value in args.items()}
+            if task is None:
+                events = [{**event, "ph": "X", "dur": (end - start) / 1000}]
+            else:
+                # nested spans of a task share its id and are nested by the viewer
+                event["id"] = hex(id(task))
+                events = [
+                    {**event, "ph": "b"},
+                    {**event, "ph": "e", "ts": end / 1000},
+                ]
+            self._add(events)
+
+    def export(self, path: Path) -> None:
+        """
+        Writes the spans collected so far to the given file and starts a new trace.
+        """
+        with self._lock:
+            events = self._events
+            dropped = self._dropped
+            self._events = []
+            self._dropped = 0
+        metadata = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "tid": track,
+                "args": {"name": name},
+            }
+            for track, name in self._track_names.items()
+        ]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"traceEvents": metadata + events}))
+        logging.info(f"Saved trace with {len(events)} events to {path} .")
+        if dropped > 0:
+            logging.warning(
+                f"Dropped {dropped} spans after {self.max_events} events, see TRACE_MAX_EVENTS."
+            )
+
+    def _add(self, events: list[dict]) -> None:
+        with self._lock:
+            if len(self._events) + len(events) > self.max_events:
+                self._dropped += 1
+            else:
+                self._events.extend(events)
+
+    @staticmethod
+    def _get_task() -> asyncio.Task | None:
+        try:
+            return asyncio.current_task()
+        except RuntimeError:
+            # no event loop in this thread, e.g. a worker of App
+            return None
+
+    def _get_track(self) -> int:
+        ident = threading.get_ident()
+        track = self._tracks.get(ident)
+        if track is None:
+            with self._lock:
+                track = self._tracks.setdefault(ident, len(self._tracks) + 1)
+                self._track_names[track] = threading.current_thread().name
+        return track
+
+
+tracer = Tracer()
@@ -0,0 +1,134 @@
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from statistics import median
+
+from robot.device_types import DeviceTypes
+from robot.pages import Pages
+from robot.paths import get_cache_dir
+from robot.states import DefinedUIState, Games
+from robot.transitions import DefinedTransition
+
+Edge = tuple[DefinedUIState, DefinedUIState]
+
+
+@dataclass
+class TransitionStats:
+    count: int = 0
+    failures: int = 0
+    # sum over the successful runs, in seconds
+    total_duration: float = 0.0
+
+    def mean_duration(self) -> float | None:
+        successes = self.count - self.failures
+        if successes == 0:
+            return None
+        return self.total_duration / successes
+
+    def failure_rate(self) -> float:
+        return self.failures / self.count if self.count > 0 else 0.0
+
+
+class TransitionStatsStore:
+    """
+    Measured durations and failures per transition, stored in `transition_stats.json` in the cache directory.
+    """
+
+    file_name = "transition_stats.json"
+
+    def __init__(self, path: Path | None = None, min_samples: int = 3):
+        self.path = path if path is not None else get_cache_dir() / self.file_name
+        # transitions with fewer successful runs keep their static cost
+        self.min_samples = min_samples
+        self.use_measured_costs = os.environ.get("MEASURED_COSTS") is not None
+        self._stats: dict[Edge, TransitionStats] | None = None
+
+    def record(
+        self, transition: DefinedTransition, duration: float, failed: bool
+    ) -> None:
+        stats = self._load().setdefault(
+            (transition.old, transition.new), TransitionStats()
+        )
+        stats.count += 1
+        if failed:
+            stats.failures += 1
+        else:
+            stats.total_duration += duration
+
+    def get(self, transition: DefinedTransition) -> TransitionStats | None:
+        return self._load().get((transition.old, transition.new))
+
+    def costs(self) -> dict[Edge, float]:
+        """
+        Returns the expected duration in seconds of each sufficiently measured transition, including retries after failures.
+        """
+        costs: dict[Edge, float] = {}
+        for edge, stats in self._load().items():
+            mean_duration = stats.mean_duration()
+            if mean_duration is None or stats.count - stats.failures < self.min_samples:
+                continue
+            # a failed attempt has to be repeated, the failure rate is capped to keep the cost finite
+            failure_rate = min(stats.failure_rate(), 0.9)
+            costs[edge] = round(mean_duration / (1 - failure_rate), 1)
+        return costs
+
+    def save(self) -> None:
+        if self._stats is None:
+            return
+        content = {
+            self._format_edge(edge): asdict(stats)
+            for edge, stats in sorted(
+                self._stats.items(), key=lambda item: self._format_edge(item[0])
+            )
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # an interrupted session must not leave a truncated file behind
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(content, indent=2) + "\n")
+        tmp_path.replace(self.path)
+        logging.info(f"Save stats of {len(content)} transitions to {self.path} .")
+
+    def _load(self) -> dict[Edge, TransitionStats]:
+        if self._stats is not None:
+            return self._stats
+        self._stats = {}
+        if not self.path.exists():
+            return self._stats
+        try:
+            content = json.loads(self.path.read_text())
+        except ValueError:
+            logging.warning(f"Ignore invalid transition stats {self.path} .")
+            return self._stats
+        for key, entry in content.items():
+            try:
+                edge = self._parse_edge(key)
+            except ValueError:
+                # states of removed pages, games or devices
+                continue
+            self._stats[edge] = TransitionStats(**entry)
+        return self._stats
+
+    @staticmethod
+    def _format_edge(edge: Edge) -> str:
+        return " -> ".join(
+            f"{state.page.value},{state.game.value},{state.device.value}"
+            for state in edge
+        )
+
+    @staticmethod
+    def _parse_edge(key: str) -> Edge:
+        states = []
+        for part in key.split(" -> "):
+            page, game, device = part.split(",")
+            states.append(
+                DefinedUIState(
+                    page=Pages(page), game=Games(game), device=DeviceTypes(device)
+                )
+            )
+        old, new = states
+        return old, new
+
+
+transition_stats = TransitionStatsStore()
@@ -1,12 +1,21 @@
+import hashlib
+import inspect
+import logging
+import tempfile
 from dataclasses import dataclass
+from pathlib import Path
+from statistics import median
 from typing import Callable
 
+import numpy
+
 from robot.device_types import DeviceTypes
-from robot.pages import Pages, PageTags
+from robot.pages import Pages, PageTags, _page_tags
+from robot.paths import get_cache_dir
 from robot.states import DefinedUIState as DS
 from robot.states import Games
 from robot.states import UIState as S
-from robot.states import expand_states
+from robot.states import expand_state
 from shared.utils import PrintDuration
 
 
@@ -124,25 +133,182 @@ class Transitions:
         T(S(DeviceTypes.strap), S(DeviceTypes.not_connected), 3, _keep_page_and_game),
     ]
 
-    def __init__(self):
+    def __init__(self, measured_costs: dict[tuple[DS, DS], float] | None = None):
+        """
+        measured_costs: expected durations in seconds replacing the static costs, see TransitionStatsStore.costs()
+        """
+        cache_path = self.get_cache_path()
+        if not self._load_graph(cache_path):
+            self._compile_graph()
+            self._save_graph(cache_path)
+        if measured_costs:
+            # measured costs change every session, only the static graph is cached
+            self._apply_measured_costs(self._expanded_transitions, measured_costs)
+            index = {state: i for i, state in enumerate(self._states)}
+            with PrintDuration("generating all paths with measured costs"):
+                self._dist, self._prev = self._floyd_warshall(
+                    self._expanded_transitions, index
+                )
+        self._index = {state: i for i, state in enumerate(self._states)}
+        self._edges = {(t.old, t.new): t for t in self._expanded_transitions}
+        self._outgoing: dict[DS, list[DefinedTransition]] = {}
+        for transition in sorted(self._expanded_transitions, key=lambda t: t.cost):
+            self._outgoing.setdefault(transition.old, []).append(transition)
+        # indices of the expanded states per partial target (page, game, device)
+        self._candidates: dict[tuple, numpy.ndarray] = {}
+
+    def _compile_graph(self):
         with PrintDuration("expanding transitions"):
             self._expanded_transitions = self._expand_transitions(
                 self._base_transitions
             )
+        self._states = list(DS.valid_states())
+        index = {state: i for i, state in enumerate(self._states)}
         with PrintDuration("generating all paths (Floyd-Warshall)"):
-            dist, prev = self._floyd_warshall(self._expanded_transitions)
-        self._all_paths = {
-            u: {v: self._path(u, v, prev) for v in DS.valid_states()}
-            for u in DS.valid_states()
-        }
+            self._dist, self._prev = self._floyd_warshall(
+                self._expanded_transitions, index
+            )
+
+    @staticmethod
+    def _apply_measured_costs(
+        transitions: list[DefinedTransition],
+        measured_costs: dict[tuple[DS, DS], float],
+    ):
+        # static costs of unmeasured transitions are scaled to seconds by the typical ratio of the measured ones
+        ratios = [
+            measured_costs[(t.old, t.new)] / t.cost
+            for t in transitions
+            if (t.old, t.new) in measured_costs and t.cost > 0
+        ]
+        scale = median(ratios) if ratios else 1.0
+        for transition in transitions:
+            transition.cost = measured_costs.get(
+                (transition.old, transition.new), transition.cost * scale
+            )
+
+    @classmethod
+    def get_cache_path(cls) -> Path:
+        key = cls._graph_key()[:16]
+        return get_cache_dir() / f"transitions_{key}.npz"
+
+    @classmethod
+    def _graph_key(cls) -> str:
+        """
+        Hash of everything the compiled graph depends on, changes invalidate the cache.
+        """
+        digest = hashlib.sha256()
+
+        def update(*parts):
+            digest.update(repr(parts).encode())
+
+        for transition in cls._base_transitions:
+            update(
+                str(transition.old),
+                str(transition.new),
+                transition.cost,
+                transition.condition.__name__,
+            )
+        # conditions call each other, hash the code of all of them
+        for name, value in sorted(globals().items()):
+            if inspect.isfunction(value) and value.__module__ == __name__:
+                code = value.__code__
+                consts = [c for c in code.co_consts if not inspect.iscode(c)]
+                update(name, code.co_code, consts, code.co_names)
+        for page in Pages:
+            update(page.name, page.value, [tag.name for tag in _page_tags[page]])
+        for tag in PageTags:
+            update(tag.name, tag.value)
+        for game in Games:
+            update(game.name, game.value)
+        for device in DeviceTypes:
+            update(device.name, device.value)
+        update([str(state) for state in DS.valid_states()])
+        return digest.hexdigest()
+
+    def _load_graph(self, cache_path: Path) -> bool:
+        if not cache_path.exists():
+            return False
+        try:
+            with numpy.load(cache_path, allow_pickle=False) as data:
+                states = [
+                    DS(page=Pages(page), game=Games(game), device=DeviceTypes(device))
+                    for page, game, device in data["states"]
+                ]
+                self._expanded_transitions = [
+                    DefinedTransition(old=states[i], new=states[j], cost=float(cost))
+                    for (i, j), cost in zip(data["edges"], data["costs"])
+                ]
+                self._dist = data["dist"]
+                self._prev = data["prev"]
+        except (OSError, KeyError, ValueError) as e:
+            logging.warning(f"Failed to load transitions cache {cache_path}: {e}")
+            return False
+        self._states = states
+        return True
+
+    def _save_graph(self, cache_path: Path):
+        # the cache is only an optimization, failing to write it must not fail the run
+        index = {state: i for i, state in enumerate(self._states)}
+        tmp_path = None
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # write to a unique temporary file first, concurrent test runs may load or write the cache
+            with tempfile.NamedTemporaryFile(
+                dir=cache_path.parent,
+                prefix=f"{cache_path.stem}_",
+                suffix=".tmp",
+                delete=False,
+            ) as f:
+                tmp_path = Path(f.name)
+                numpy.savez(
+                    f,
+                    states=numpy.array(
+                        [
+                            [s.page.value, s.game.value, s.device.value]
+                            for s in self._states
+                        ]
+                    ),
+                    edges=numpy.array(
+                        [
+                            [index[t.old], index[t.new]]
+                            for t in self._expanded_transitions
+                        ],
+                        dtype=numpy.intp,
+                    ).reshape(-1, 2),
+                    costs=numpy.array(
+                        [t.cost for t in self._expanded_transitions],
+                        dtype=numpy.float64,
+                    ),
+                    dist=self._dist,
+                    prev=self._prev,
+                )
+            tmp_path.replace(cache_path)
+        except OSError as e:
+            logging.warning(f"Failed to save transitions cache {cache_path}: {e}")
+            if tmp_path is not None:
+                try:
+                    tmp_path.unlink(missing_ok=True)
+                except OSError:
+                    pass
+            return
+        logging.info(f"Saved transitions cache {cache_path} .")
+        # caches of previous definitions are not used anymore
+        for old_path in cache_path.parent.glob("transitions_*.npz"):
+            if old_path == cache_path:
+                continue
+            try:
+                old_path.unlink(missing_ok=True)
+            except OSError as e:
+                # e.g. opened by another test run on Windows
+                logging.warning(f"Failed to delete transitions cache {old_path}: {e}")
 
     @staticmethod
     def _expand_transitions(transitions: list[_Transition]) -> list[DefinedTransition]:
         # expand states
         new_defined_transitions: list[DefinedTransition] = []
         for transition in transitions:
-            expanded_old_states = expand_states([transition.old])
-            expanded_new_states = expand_states([transition.new])
+            expanded_old_states = expand_state(transition.old)
+            expanded_new_states = expand_state(transition.new)
             for old in expanded_old_states:
                 for new in expanded_new_states:
                     new_transition = DefinedTransition(
@@ -167,68 +333,80 @@ class Transitions:
     @staticmethod
     def _floyd_warshall(
         transitions: list[DefinedTransition],
-    ) -> tuple[
-        dict[DS, dict[DS, float]],
-        dict[DS, dict[DS, DS | None]],
-    ]:
-        dist: dict[DS, dict[DS, float]] = {
-            u: {v: float("inf") for v in DS.valid_states()} for u in DS.valid_states()
-        }
-        prev: dict[DS, dict[DS, DS | None]] = {
-            u: {v: None for v in DS.valid_states()} for u in DS.valid_states()
-        }
+        index: dict[DS, int],
+    ) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Returns: the distance matrix and the predecessor matrix (-1 if unreachable), both indexed like `index`
+        """
+        n = len(index)
+        dist = numpy.full((n, n), numpy.inf)
+        prev = numpy.full((n, n), -1, dtype=numpy.intp)
 
         for edge in transitions:
-            dist[edge.old][edge.new] = edge.cost
-            prev[edge.old][edge.new] = edge.old
-        for vertex in DS.valid_states():
-            dist[vertex][vertex] = 0
-            prev[vertex][vertex] = vertex
-        for k in DS.valid_states():
-            for i in DS.valid_states():
-                for j in DS.valid_states():
-                    if dist[i][j] > dist[i][k] + dist[k][j]:
-                        dist[i][j] = dist[i][k] + dist[k][j]
-                        prev[i][j] = prev[k][j]
+            dist[index[edge.old], index[edge.new]] = edge.cost
+            prev[index[edge.old], index[edge.new]] = index[edge.old]
+        numpy.fill_diagonal(dist, 0)
+        numpy.fill_diagonal(prev, numpy.arange(n))
+        for k in range(n):
+            # row k and column k do not change in iteration k, so relaxing all (i, j) at once is equivalent to the nested loops
+            via_k = dist[:, k, None] + dist[None, k, :]
+            shorter = dist > via_k
+            dist = numpy.where(shorter, via_k, dist)
+            prev = numpy.where(shorter, prev[None, k, :], prev)
 
         return dist, prev
 
-    @staticmethod
-    def _path(u: DS, v: DS, prev: dict[DS, dict[DS, DS | None]]) -> list[DS]:
-        if prev[u][v] is None:
+    def _path(self, u: DS, v: DS) -> list[DS]:
+        i = self._index[u]
+        j = self._index[v]
+        if self._prev[i, j] < 0:
             raise ValueError(f"No path from {u} to {v}")
-        _u = u
-        _v: DS | None = v
-        path = [_v]
-        while _u != _v:
-            assert prev[_u] is not None and _v is not None
-            _v = prev[_u][_v]
-            assert _v is not None
-            path.insert(0, _v)
-        return path
+        path = [j]
+        while j != i:
+            j = int(self._prev[i, j])
+            path.append(j)
+        return [self._states[k] for k in reversed(path)]
+
+    def get_neighbours(self, state: DS) -> list[DS]:
+        """
+        Returns the states reachable from the given state with a single transition, cheapest first.
+        """
+        return [t.new for t in self._outgoing.get(state, [])]
 
     def get_next_transition(self, old: DS, new: DS | S) -> DefinedTransition:
-        # find suiting transition
-        if isinstance(new, DS):
-            next_target = self._all_paths[old][new][1]
-            transition = next(
-                t
-                for t in self._expanded_transitions
-                if t.old == old and t.new == next_target
-            )
-            return transition
-        else:
-            # pick any suiting transition
-            expanded_new = expand_states([new])
-            for candidate in expanded_new:
-                try:
-                    next_target = self._all_paths[old][candidate][1]
-                    transition = next(
-                        t
-                        for t in self._expanded_transitions
-                        if t.old == old and t.new == next_target
-                    )
-                    return transition
-                except (KeyError, IndexError):
-                    continue
+        return self.get_route(old, new)[0]
+
+    def get_route(self, old: DS, new: DS | S) -> list[DefinedTransition]:
+        """
+        Returns the cheapest sequence of transitions from the old state to the new state. Partial states are resolved to their cheapest suiting state.
+        """
+        target = new if isinstance(new, DS) else self._get_cheapest_target(old, new)
+        path = self._path(old, target)
+        return [self._edges[(u, v)] for u, v in zip(path, path[1:])]
+
+    def _get_cheapest_target(self, old: DS, new: S) -> DS:
+        if old not in self._index:
             raise ValueError(f"No transition found from {old} to {new}")
+        candidates = self._get_candidates(new)
+        i = self._index[old]
+        costs = self._dist[i, candidates]
+        # staying in the old state is not a transition
+        costs = numpy.where(candidates == i, numpy.inf, costs)
+        if len(costs) == 0 or numpy.isinf(costs.min()):
+            raise ValueError(f"No transition found from {old} to {new}")
+        return self._states[int(candidates[numpy.argmin(costs)])]
+
+    def _get_candidates(self, state: S) -> numpy.ndarray:
+        key = (state.page, state.game, state.device)
+        if key not in self._candidates:
+            self._candidates[key] = numpy.array(
+                [s.id() for s in expand_state(state)], dtype=numpy.intp
+            )
+        return self._candidates[key]
+
+
+if __name__ == "__main__":
+    # builds the cache ahead of time, e.g. during deployment
+    logging.basicConfig(level=logging.INFO)
+    Transitions()
+    logging.info(f"Transitions cache {Transitions.get_cache_path()} OK")
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import numpy
+
+from robot.frame_fingerprint import FrameFingerprint, UnchangedMissCache
+
+bbox = (100, 100, 500, 400)
+key = (Path("home/assert_stats_label.png"), 0.9)
+hint_rect = (40, 40, 120, 80)
+window_rect = (0, 0, 400, 300)
+
+
+def grab(seed: int) -> FrameFingerprint:
+    gray_image = numpy.random.default_rng(seed).integers(
+        0, 256, size=(300, 400), dtype=numpy.uint8
+    )
+    return FrameFingerprint.of(gray_image, bbox)
+
+
+def poll(cache: UnchangedMissCache, fingerprint: FrameFingerprint) -> None:
+    # a template with a region hint is searched in the hint first, then in the whole window, like App.locate_match
+    for rect in (hint_rect, window_rect):
+        if not cache.is_unchanged_miss(key, fingerprint, rect):
+            cache.record(key, fingerprint, rect, found=False)
+
+
+def test_unchanged_frame_skips_hint_and_window():
+    cache = UnchangedMissCache()
+    fingerprint = grab(0)
+    for _ in range(5):
+        poll(cache, fingerprint)
+    stats = cache.stats()
+    assert stats.executed == 2
+    assert stats.skipped == 8
+
+
+def test_changed_frame_matches_again():
+    cache = UnchangedMissCache()
+    poll(cache, grab(0))
+    poll(cache, grab(1))
+    stats = cache.stats()
+    assert stats.executed == 4
+    assert stats.skipped == 0
+
+
+def test_found_clears_only_its_rect():
+    cache = UnchangedMissCache()
+    fingerprint = grab(0)
+    poll(cache, fingerprint)
+    cache.record(key, fingerprint, window_rect, found=True)
+    assert cache.is_unchanged_miss(key, fingerprint, hint_rect)
+    assert not cache.is_unchanged_miss(key, fingerprint, window_rect)
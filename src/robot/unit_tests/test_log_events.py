@@ -0,0 +1,82 @@
+from datetime import datetime
+from pathlib import Path
+
+from robot.log_events import (
+    EmulatorConnected,
+    EmulatorDisconnected,
+    LogEventIndex,
+    LogException,
+    LogParser,
+    parse_file,
+)
+
+player_log = Path(__file__).parent / "logs" / "Player.log"
+
+
+def test_parse_connect_and_disconnect():
+    parser = LogParser()
+    connected = parser.parse("Emulator: connect glove_right")
+    assert isinstance(connected, EmulatorConnected)
+    assert connected.device_name == "glove_right"
+    disconnected = parser.parse("Emulator: disconnect")
+    assert isinstance(disconnected, EmulatorDisconnected)
+    assert disconnected.sequence == connected.sequence + 1
+
+
+def test_parse_exception():
+    event = LogParser().parse(
+        "NullReferenceException: Object reference not set to an instance of an object"
+    )
+    assert isinstance(event, LogException)
+    assert event.exception_type == "NullReferenceException"
+    assert event.message == "Object reference not set to an instance of an object"
+
+
+def test_ignore_unknown_lines():
+    parser = LogParser()
+    assert parser.parse("UnloadTime: 0.642100 ms") is None
+    # stack trace lines belong to the exception before them
+    assert parser.parse("  at Cynteract.UI.HomePage.OnEnable () [0x00000]") is None
+    assert parser.parse("Emulator: connect glove_right").sequence == 1
+
+
+def test_parse_file():
+    index = parse_file(player_log)
+    connected = index.of_type(EmulatorConnected)
+    assert [event.device_name for event in connected] == ["glove_right", "glove_left"]
+    assert len(index.of_type(EmulatorDisconnected)) == 2
+    exceptions = index.of_type(LogException)
+    assert [event.exception_type for event in exceptions] == [
+        "NullReferenceException",
+        "Cynteract.Networking.SyncException",
+    ]
+    assert index.last_sequence == 6
+    assert index.last(EmulatorDisconnected).sequence == 6
+
+
+def test_of_type_after():
+    index = parse_file(player_log)
+    first_disconnect = index.of_type(EmulatorDisconnected)[0]
+    connected = index.of_type(EmulatorConnected, after=first_disconnect.sequence)
+    assert [event.device_name for event in connected] == ["glove_left"]
+    assert index.of_type(LogException, after=index.last_sequence) == []
+    assert index.of_type(LogException, after=0) == index.of_type(LogException)
+
+
+def test_ring_bounds():
+    parser = LogParser()
+    index = LogEventIndex(max_events_per_type=3)
+    time = datetime(2024, 1, 1)
+    for i in range(5):
+        index.add(parser.parse(f"Emulator: connect glove_{i}", time))
+    index.add(parser.parse("Emulator: disconnect", time))
+    connected = index.of_type(EmulatorConnected)
+    assert [event.device_name for event in connected] == [
+        "glove_2",
+        "glove_3",
+        "glove_4",
+    ]
+    # other types keep their own bound
+    assert len(index.of_type(EmulatorDisconnected)) == 1
+    assert index.last(EmulatorConnected).device_name == "glove_4"
+    assert index.last(LogException) is None
@@ -1,39 +1,64 @@
 import asyncio
+from dataclasses import dataclass
 from pathlib import Path
 
 import pynput
 
 from robot.app import App
-from robot.config import get_screenshot_dir
+from robot.paths import get_screenshot_dir
 from robot.timeout import Timeout
+from robot.tracing import tracer
 
 mouse = pynput.mouse.Controller()
 keyboard = pynput.keyboard.Controller()
 
 
 async def tween_mouse_to(target: tuple[int, int], velocity: float = 2000):
-    start = mouse.position
-    distance = ((start[0] - target[0]) ** 2 + (start[1] - target[1]) ** 2) ** 0.5
-    fps = 60
-    steps = int(distance / velocity * fps)
-    for step in range(1, steps + 1):
-        t = step / steps
-        new_x = int(start[0] + (target[0] - start[0]) * t)
-        new_y = int(start[1] + (target[1] - start[1]) * t)
-        mouse.position = (new_x, new_y)
-        await asyncio.sleep(1 / fps)
+    with tracer.span("tween mouse", "input", target=target):
+        start = mouse.position
+        distance = ((start[0] - target[0]) ** 2 + (start[1] - target[1]) ** 2) ** 0.5
+        fps = 60
+        steps = int(distance / velocity * fps)
+        for step in range(1, steps + 1):
+            t = step / steps
+            new_x = int(start[0] + (target[0] - start[0]) * t)
+            new_y = int(start[1] + (target[1] - start[1]) * t)
+            mouse.position = (new_x, new_y)
+            await asyncio.sleep(1 / fps)
+
+
+@dataclass
+class KeyPacing:
+    """Pauses while typing. Text fields need a pause per key, commands that the app reads once per frame do not."""
+
+    # pause after each key, in seconds
+    interval: float = 0.05
+    # pause after the whole batch, e.g. until the app processed it in its next frame
+    settle: float = 0.0
+
+
+async def type_batch(
+    text: str,
+    pacing: KeyPacing,
+    controller: pynput.keyboard.Controller = keyboard,
+):
+    with tracer.span("type text", "input", length=len(text)):
+        for char in text:
+            controller.press(char)
+            controller.release(char)
+            if pacing.interval > 0:
+                await asyncio.sleep(pacing.interval)
+        await asyncio.sleep(pacing.settle)
 
 
 async def type_text(text: str, interval: float = 0.05):
-    for char in text:
-        keyboard.press(char)
-        keyboard.release(char)
-        await asyncio.sleep(interval)
+    await type_batch(text, KeyPacing(interval=interval))
 
 
 async def type_key(key: pynput.keyboard.Key):
-    keyboard.press(key)
-    keyboard.release(key)
+    with tracer.span("type key", "input", key=key):
+        keyboard.press(key)
+        keyboard.release(key)
 
 
 async def click_image(
@@ -49,8 +74,8 @@ async def click_image(
         f"Image {image_path} not found on screen within {timeout} seconds",
     )
     while True:
-        bbox_or_null = await app.locate(
-            image_path, confidence=confidence, region=region
+        bbox_or_null = await timer.wait_for(
+            app.locate(image_path, confidence=confidence, region=region)
         )
         if bbox_or_null:
             await tween_mouse_to(
@@ -59,7 +84,9 @@ async def click_image(
                     (bbox_or_null[1] + bbox_or_null[3]) // 2,
                 )
             )
-            mouse.click(pynput.mouse.Button.left, 1)
+            with tracer.span("click", "input"):
+                mouse.click(pynput.mouse.Button.left, 1)
+            app.capture_scheduler.invalidate()
             await asyncio.sleep(0.2)
             return
         timer.check()
@@ -67,7 +94,8 @@ async def click_image(
 
 
 async def left_click():
-    mouse.click(pynput.mouse.Button.left, 1)
+    with tracer.span("click", "input"):
+        mouse.click(pynput.mouse.Button.left, 1)
     await asyncio.sleep(0.2)
 
 
@@ -80,7 +108,7 @@ async def assert_any_image(
     )
     while True:
         for image_path in image_paths:
-            bbox_or_null = await app.locate(image_path)
+            bbox_or_null = await timer.wait_for(app.locate(image_path))
             if bbox_or_null:
                 return
         timer.check()
@@ -95,7 +123,9 @@ async def assert_image(
         f"Image {image_path} not found on screen within {timeout} seconds",
     )
     while True:
-        bbox_or_null = await app.locate(image_path, confidence=confidence)
+        bbox_or_null = await timer.wait_for(
+            app.locate(image_path, confidence=confidence)
+        )
         if bbox_or_null:
             return
         timer.check()
@@ -70,6 +70,14 @@ def deploy_robot(robot_config: RobotConfig):
     else:
         logging.info(f"Pip requirements OK")
 
+    # Build the navigation graph cache, so the first test run does not have to
+    logging.info(f"Build transitions cache.")
+    subprocess.run(
+        [str(venv_python), "-m", "robot.transitions"],
+        env={**os.environ, "PYTHONPATH": str(project_root / "src")},
+        check=True,
+    )
+
     # Install node and dependencies for firebase user scripts if not already installed
     firebase_scripts_dir = project_root / "src" / "firebase_user_scripts"
     if not (firebase_scripts_dir / "node_modules").exists():